@@ -0,0 +1,42 @@
+"""normalize clients cpf and email
+
+Revision ID: 08e9a5b5f147
+Revises: 50430ac57fbd
+Create Date: 2026-10-18 13:21:47.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '08e9a5b5f147'
+down_revision: Union[str, None] = '50430ac57fbd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CPF sem pontuação e email em minúsculas, como a API passa a gravar.
+    # Se duas linhas colidirem após a normalização, os índices únicos
+    # interrompem a migração: resolva as duplicatas antes de reaplicar.
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            r"UPDATE clients SET cpf = regexp_replace(cpf, '[.\-/\s]', '', 'g'), email = lower(email) "
+            r"WHERE cpf ~ '[.\-/\s]' OR email <> lower(email)"
+        )
+    else:
+        cpf = "cpf"
+        for char in ('.', '-', '/', ' '):
+            cpf = f"replace({cpf}, '{char}', '')"
+        op.execute(f"UPDATE clients SET cpf = {cpf}, email = lower(email) WHERE cpf <> {cpf} OR email <> lower(email)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # A pontuação original não é recuperável; a forma canônica continua válida
+    pass
@@ -0,0 +1,28 @@
+"""add clients name id index
+
+Revision ID: 2a3d2f8bf1ec
+Revises: 1fc7ceae9914
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a3d2f8bf1ec'
+down_revision: Union[str, None] = '1fc7ceae9914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_clients_name_id', 'clients', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clients_name_id', table_name='clients')
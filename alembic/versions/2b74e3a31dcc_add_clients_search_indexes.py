@@ -0,0 +1,63 @@
+"""add clients search indexes
+
+Revision ID: 2b74e3a31dcc
+Revises: 2a3d2f8bf1ec
+Create Date: 2026-10-18 10:04:55.503917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b74e3a31dcc'
+down_revision: Union[str, None] = '2a3d2f8bf1ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_clients_name_trgm ON clients USING gin (name gin_trgm_ops)')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_clients_email_trgm ON clients USING gin (email gin_trgm_ops)')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5("
+            "name, email, content='clients', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+            "INSERT INTO clients_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+            "INSERT INTO clients_fts(clients_fts, rowid, name, email) "
+            "VALUES ('delete', old.id, old.name, old.email); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN "
+            "INSERT INTO clients_fts(clients_fts, rowid, name, email) "
+            "VALUES ('delete', old.id, old.name, old.email); "
+            "INSERT INTO clients_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+        )
+        # Indexa as linhas que já existiam antes da migração
+        op.execute("INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_clients_email_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_clients_name_trgm')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS clients_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS clients_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS clients_fts_ai')
+        op.execute('DROP TABLE IF EXISTS clients_fts')
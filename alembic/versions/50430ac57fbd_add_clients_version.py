@@ -0,0 +1,29 @@
+"""add clients version
+
+Revision ID: 50430ac57fbd
+Revises: 2b74e3a31dcc
+Create Date: 2026-10-18 11:37:02.614850
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '50430ac57fbd'
+down_revision: Union[str, None] = '2b74e3a31dcc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clients', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('clients') as batch_op:
+        batch_op.drop_column('version')
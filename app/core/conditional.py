@@ -0,0 +1,35 @@
+import hashlib
+
+from fastapi import Response
+
+
+def client_etag(client) -> str:
+    # ETag forte: muda sempre que a versão da linha muda
+    return f'"{client.id}-{client.version}"'
+
+
+def list_etag(clients) -> str:
+    # Validador agregado da página: ids e versões, sem serializar o corpo
+    digest = hashlib.sha1(",".join(f"{c.id}-{c.version}" for c in clients).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = True) -> bool:
+    """Compara o ETag com If-None-Match (weak=True) ou If-Match (weak=False)."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: dict | None = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
@@ -1,54 +1,147 @@
+import os
 from fastapi import Depends, HTTPException, status
 from app.core.auth_scheme import OAuth2PasswordBearerWithCookie
 from jwt import PyJWTError as JWTError
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
-from app.db.connection import SessionLocal
+from app.db import connection
+from app.db.connection import DB_ASYNC, AsyncSessionLocal, SessionLocal, close_db, run_db
 from app.models.user import User
 from app.core.security import decode_token
+from app.core.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="/auth/login")
 
-def get_db():
+# Cache de usuários autenticados, indexado pelo "sub" do token. O TTL é a
+# janela máxima para que uma revogação feita fora do ORM passe a valer.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+
+principal_cache = TTLCache(max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(email: str | None):
+    if email:
+        principal_cache.delete(email)
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal_on_change(mapper, connection, target):
+    # Cadastro, troca de papel/email e remoção invalidam o usuário em cache
+    invalidate_principal(target.email)
+    for old_email in inspect(target).attrs.email.history.deleted:
+        invalidate_principal(old_email)
+
+# Sessão única por requisição: como o FastAPI reaproveita o resultado das
+# dependências dentro da mesma requisição, get_current_user e o endpoint
+# compartilham esta sessão (e uma única conexão do pool).
+#
+# O commit/rollback das escritas fica em run_write (app.db.connection), que
+# termina antes de a resposta sair. O FastAPI roda o fim destas dependências
+# após enviar a resposta, então aqui apenas se fecha a sessão; o que não foi
+# confirmado é descartado.
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+# Read-your-writes: quem escreveu lê do primário por esta janela, que deve
+# cobrir o atraso de replicação da réplica
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+recent_writers = TTLCache(max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl=READ_YOUR_WRITES_SECONDS)
+
+@event.listens_for(Session, "after_flush")
+def _mark_write_on_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_write_on_execute(orm_execute_state):
+    # INSERT/UPDATE/DELETE emitidos com db.execute(), fora do flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _stick_writer_to_primary(session):
+    principal = session.info.get("principal")
+    if session.info.pop("wrote", False) and principal:
+        recent_writers.set(principal, True)
+
+@event.listens_for(Session, "after_rollback")
+def _clear_write_on_rollback(session):
+    session.info.pop("wrote", None)
+
+def _load_principal(db: Session, email: str):
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        # Desanexa da sessão para que o objeto em cache não expire no commit
+        db.expunge(user)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não autenticado",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    print("TOKEN:", token)
-
     if not token:
-        print("❌ TOKEN ausente")
+        logger.info("Token ausente")
         raise credentials_exception
 
     try:
         pure_token = token.replace("Bearer ", "").strip()
         payload = decode_token(pure_token)
-        print("✅ DECODE:", payload)
         if not token.startswith("Bearer "):
-            print("❌ Token fora do formato esperado")
+            logger.info("Token fora do formato esperado")
             raise credentials_exception
         email: str = payload.get("sub")
         if email is None:
-            print("❌ EMAIL ausente no payload")
+            logger.info("Email ausente no payload")
             raise credentials_exception
     except JWTError as e:
-        print("❌ JWTError:", e)
+        logger.info("Token rejeitado", extra={"error": str(e)})
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
-    print("🔎 USER:", user)
-
+    user = principal_cache.get(email)
     if user is None:
-        print("❌ Usuário não encontrado")
-        raise credentials_exception
+        user = await run_db(db, _load_principal, email)
+        if user is None:
+            logger.info("Usuário do token não encontrado", extra={"sub": email})
+            raise credentials_exception
 
-    print("✅ Usuário autenticado:", user.email)
-    return user
\ No newline at end of file
+        principal_cache.set(email, user)
+
+    # Identifica quem escreve por esta sessão (read-your-writes)
+    db.info["principal"] = user.email
+    logger.debug("Usuário autenticado", extra={"sub": user.email})
+    return user
+
+async def get_read_db(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Sessão para leituras que toleram o atraso da réplica.
+
+    Sem READ_REPLICA_URL, ou se o usuário escreveu há menos de
+    READ_YOUR_WRITES_SECONDS, devolve a própria sessão da requisição
+    (primário). A sessão da réplica é marcada com info["replica"].
+    """
+    replica_sessions = connection.AsyncReplicaSessionLocal if DB_ASYNC else connection.ReplicaSessionLocal
+    if replica_sessions is None or recent_writers.get(user.email):
+        yield db
+        return
+    replica = replica_sessions()
+    replica.info["replica"] = True
+    try:
+        yield replica
+    finally:
+        await close_db(replica)
\ No newline at end of file
@@ -0,0 +1,119 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Nível dos loggers "app.*"; abaixo de WARNING nada é emitido por padrão
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+# Amostragem por logger, ex.: "app.core.dependencies=0.01,app.core.security=0.1"
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+JWT_PATTERN = re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+")
+SENSITIVE_KEYS = {"token", "access_token", "refresh_token", "password", "hashed_password", "authorization"}
+REDACTED = "[REDACTED]"
+
+# Atributos padrão do LogRecord; o resto veio de extra= e entra no JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def parse_sampling(value: str) -> dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, rate = item.split("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def redact(value):
+    if isinstance(value, str):
+        return JWT_PATTERN.sub(REDACTED, value)
+    if isinstance(value, dict):
+        return {k: REDACTED if k.lower() in SENSITIVE_KEYS else redact(v) for k, v in value.items()}
+    return value
+
+
+class SamplingFilter(logging.Filter):
+    """Descarta uma fração dos registros abaixo de WARNING, por logger.
+
+    Vale o prefixo mais longo configurado (app.core casa app.core.security).
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition(".")[0]
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de extra= e segredos mascarados."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+        }
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+        entry.update(redact(fields))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+
+
+def setup_logging(stream=None) -> QueueListener:
+    """Liga os loggers "app.*" a uma fila consumida por uma thread de fundo.
+
+    Quem loga só enfileira o registro; formatação, redação e escrita no
+    stream acontecem na thread do QueueListener.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(parse_sampling(LOG_SAMPLING)))
+
+    logger = logging.getLogger("app")
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Esvazia a fila e desliga os loggers "app.*" do listener."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logger = logging.getLogger("app")
+    logger.removeHandler(_queue_handler)
+    logger.propagate = True
+    _listener.stop()
+    _listener = _queue_handler = None
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from collections import Counter as StatementCounter
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# METRICS_ENABLED=false remove o middleware e o endpoint /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Limites (segundos) dos histogramas de latência
+LATENCY_BUCKETS = tuple(
+    float(b) for b in os.getenv("METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10").split(",")
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + _labels(self.label_names, k), v) for k, v in self._values.items()]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{key} {value:g}" for key, value in self.samples())
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # contagem por faixa (não acumulada), soma e total
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            for labels, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, hits in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += hits
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append((self.name + "_bucket" + _labels(self.label_names, labels, f'le="{le}"'), cumulative))
+                lines.append((self.name + "_sum" + _labels(self.label_names, labels), total))
+                lines.append((self.name + "_count" + _labels(self.label_names, labels), count))
+        return lines
+
+
+REQUEST_LABELS = ("method", "route")
+
+http_requests = Counter("http_requests_total", "Requisições HTTP concluídas", REQUEST_LABELS + ("status",))
+http_latency = Histogram("http_request_duration_seconds", "Latência das requisições HTTP", REQUEST_LABELS)
+http_in_progress = Gauge("http_requests_in_progress", "Requisições HTTP em andamento", ("method",))
+db_queries = Counter("http_request_db_queries_total", "Consultas SQL executadas pelas requisições", REQUEST_LABELS)
+db_time = Counter("http_request_db_seconds_total", "Tempo gasto em consultas SQL pelas requisições", REQUEST_LABELS)
+
+METRICS = [http_requests, http_latency, http_in_progress, db_queries, db_time]
+
+CACHE_FIELDS = {"size": "gauge", "hits": "counter", "misses": "counter", "evictions": "counter"}
+POOL_FIELDS = {
+    "size": "gauge", "checked_out": "gauge", "overflow": "gauge",
+    "checkouts": "counter", "wait_seconds": "counter", "timeouts": "counter",
+}
+
+
+def _render_stats(prefix: str, label: str, stats: dict, fields: dict) -> list[str]:
+    lines = []
+    for stat, kind in fields.items():
+        name = f"{prefix}_{stat}" if kind == "gauge" else f"{prefix}_{stat}_total"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f'{name}{{{label}="{key}"}} {values[stat]:g}' for key, values in stats.items() if values)
+    return lines
+
+
+def render_metrics(caches: dict | None = None, pools: dict | None = None) -> str:
+    """Texto no formato de exposição do Prometheus.
+
+    caches é {nome: CacheBackend}; pools é {nome: dict de pool_stats}.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(_render_stats("cache", "cache", {name: c.stats() for name, c in (caches or {}).items()}, CACHE_FIELDS))
+    lines.extend(_render_stats("db_pool", "pool", pools or {}, POOL_FIELDS))
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class RequestStats:
+    """Consultas e tempo de banco acumulados durante uma requisição."""
+
+    path: str = ""
+    queries: int = 0
+    db_seconds: float = 0.0
+    # Execuções por texto de SQL; preenchido pelo SlowQueryRecorder (N+1)
+    statements: StatementCounter = field(default_factory=StatementCounter)
+
+
+# Definido pelo MetricsMiddleware; o threadpool e o run_sync herdam o contexto,
+# então os eventos do engine somam no objeto da requisição em curso.
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - starts.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latência por rota, requisições em andamento, status
+    e o header Server-Timing com a divisão entre aplicação e banco.
+
+    A rota é o template (/clients/{client_id}), não o caminho, para manter
+    a cardinalidade dos rótulos baixa.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats(path=f"{method} {scope['path']}")
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        http_in_progress.inc(method)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = stats.db_seconds * 1000
+                timing = (
+                    f"app;dur={total_ms - db_ms:.1f}, "
+                    f'db;dur={db_ms:.1f};desc="{stats.queries} queries", total;dur={total_ms:.1f}'
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            labels = (method, getattr(route, "path", "unmatched"))
+            http_in_progress.dec(method)
+            http_requests.inc(*labels, status_code)
+            http_latency.observe(*labels, value=elapsed)
+            db_queries.inc(*labels, amount=stats.queries)
+            db_time.inc(*labels, amount=stats.db_seconds)
+            request_stats.reset(token)
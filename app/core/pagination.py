@@ -0,0 +1,66 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+# Campos aceitos em ?sort= (prefixo "-" para ordem decrescente)
+SORT_PATTERN = r"^-?(id|name|email)$"
+
+
+def encode_cursor(sort: str, value, last_id: int) -> str:
+    raw = json.dumps({"s": sort, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = data["v"], data["id"]
+    except (ValueError, TypeError, KeyError):
+        raise invalid
+    # O cursor só vale para a mesma ordenação em que foi gerado
+    if data.get("s") != sort:
+        raise invalid
+    # O cursor vem do cliente: só tipos compatíveis com as colunas chegam ao banco
+    expected = int if sort.lstrip("-") == "id" else str
+    if not _is_type(last_id, int) or not _is_type(value, expected):
+        raise invalid
+    return value, last_id
+
+
+def _is_type(value, expected: type) -> bool:
+    # bool é subclasse de int, mas não é um id válido
+    return isinstance(value, expected) and not isinstance(value, bool)
+
+
+def keyset_paginate(query, sort: str, columns: dict, pk, after: str | None = None):
+    """Ordena por (coluna, pk) e, se houver cursor, continua após a última linha vista."""
+    descending = sort.startswith("-")
+    column = columns[sort.lstrip("-")]
+
+    if after is not None:
+        value, last_id = decode_cursor(after, sort)
+        if column is pk:
+            condition = pk < last_id if descending else pk > last_id
+        elif descending:
+            condition = or_(column < value, and_(column == value, pk < last_id))
+        else:
+            condition = or_(column > value, and_(column == value, pk > last_id))
+        query = query.filter(condition)
+
+    if column is pk:
+        return query.order_by(pk.desc() if descending else pk.asc())
+    if descending:
+        return query.order_by(column.desc(), pk.desc())
+    return query.order_by(column.asc(), pk.asc())
+
+
+def next_cursor(rows: list, sort: str, limit: int):
+    """Retorna o cursor da próxima página quando a consulta trouxe limit + 1 linhas."""
+    if limit <= 0 or len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(sort, getattr(last, sort.lstrip("-")), last.id)
@@ -0,0 +1,102 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+# RATE_LIMIT_ENABLED=false desliga a limitação (ex.: testes de carga)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Máximo de buckets mantidos em memória; os menos usados são descartados
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """Converte "10/minute" em (capacidade, fichas repostas por segundo)."""
+    amount, period = rate.split("/")
+    capacity = int(amount)
+    return capacity, capacity / PERIODS[period.strip()]
+
+
+class BucketStore:
+    """Armazena os token buckets.
+
+    MemoryBucketStore é por processo; um store compartilhado (ex.: Redis com
+    um script atômico) implementa take() para valer entre vários workers.
+    """
+
+    def take(self, key: str, capacity: int, refill_rate: float) -> float:
+        """Consome uma ficha; retorna 0 se permitido ou os segundos até a próxima."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+rate_limit_store: BucketStore = MemoryBucketStore()
+
+
+class RateLimit:
+    """Dependência de admissão: limita por IP e, opcionalmente, por conta.
+
+    Usada em dependencies=[...] da rota, roda antes da sessão do banco e do
+    bcrypt. A conta é o campo "email" do corpo JSON.
+    """
+
+    def __init__(self, scope: str, per_ip: str | None = None, per_account: str | None = None):
+        self.scope = scope
+        self.per_ip = parse_rate(per_ip) if per_ip else None
+        self.per_account = parse_rate(per_account) if per_account else None
+
+    def _check(self, key: str, rate: tuple[int, float]):
+        wait = rate_limit_store.take(f"{self.scope}:{key}", *rate)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Muitas tentativas, tente novamente mais tarde",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    async def __call__(self, request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        if self.per_ip:
+            self._check(f"ip:{request.client.host if request.client else '-'}", self.per_ip)
+        if self.per_account:
+            try:
+                body = await request.json()
+            except ValueError:
+                return
+            email = body.get("email") if isinstance(body, dict) else None
+            if isinstance(email, str):
+                self._check(f"account:{email.strip().lower()}", self.per_account)
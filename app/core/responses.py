@@ -0,0 +1,25 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da stdlib
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Resposta para conteúdo já confiável (linhas vindas do banco).
+
+    Não passa por response_model nem jsonable_encoder: o conteúdo vai
+    direto para o orjson, quando instalado.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,12 +1,33 @@
 from passlib.context import CryptContext
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
 import base64
+import hashlib
+import multiprocessing
+import threading
+import time
 import jwt
 from jwt import decode as jwt_decode, exceptions as jwt_exceptions
 import os
+from app.core.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
 
 # HASH
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Custo do bcrypt; hashes com outro custo são regravados no próximo login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Processos dedicados ao bcrypt (0 = usa o executor padrão de threads)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -14,18 +35,57 @@ def hash_password(password: str):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    # Retorna (válida, novo_hash); novo_hash só vem quando o custo mudou
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool():
+    global _hash_pool
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _hash_pool
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+async def hash_password_async(password: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_pool(), hash_password, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_hash_pool(), verify_and_update_password, plain_password, hashed_password
+    )
+
 # JWT
 SECRET_KEY = "secret-jwt-key"  # ideal: usar variável de ambiente
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Tokens já verificados, indexados pelo hash do token e válidos até o "exp"
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "4096"))
+token_cache = TTLCache(max_size=TOKEN_CACHE_MAX_SIZE)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    print("PAYLOAD no access_token:", to_encode)
-    print("TOKEN FINAL:", jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM))
+    logger.debug("Access token emitido", extra={"sub": to_encode.get("sub"), "exp": expire.isoformat()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def create_refresh_token(data: dict):
@@ -34,12 +94,22 @@ def create_refresh_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def verify_token(token: str):
+    # Verificação completa (assinatura e expiração), sem cache
+    return jwt_decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def decode_token(token: str):
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
     try:
-        print("🔹 Token recebido:", token)
-        decoded = jwt_decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("✅ DECODED payload:", decoded)
-        return decoded
+        decoded = verify_token(token)
     except jwt_exceptions.InvalidTokenError as e:
-        print("❌ JWT decode error:", e)
-        raise
\ No newline at end of file
+        logger.debug("Falha ao decodificar JWT", extra={"error": str(e)})
+        raise
+    # Só tokens válidos e com expiração entram no cache
+    exp = decoded.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(key, decoded, ttl=exp - time.time())
+    return dict(decoded)
\ No newline at end of file
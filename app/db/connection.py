@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.db.base import Base
+from app.db.pool import InstrumentedAsyncPool, InstrumentedQueuePool
 import os
 from dotenv import load_dotenv
 
@@ -10,8 +13,122 @@ POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+# DATABASE_URL permite apontar para outro banco (ex.: sqlite:///./local.db)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+# DB_ASYNC=true troca as sessões das requisições por AsyncSession
+# (asyncpg no Postgres, aiosqlite no SQLite)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+# Pool de conexões (por engine, por processo)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Testa a conexão no checkout; descarta conexões derrubadas pelo servidor
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Recria conexões mais velhas que isso (segundos); -1 desliga
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# READ_REPLICA_URL opcional: GET /clients e GET /clients/{id} leem dela
+READ_REPLICA_URL = os.getenv("READ_REPLICA_URL")
+
+def engine_options(url, is_async: bool = False) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # SQLite em memória vive numa única conexão: mantém o pool padrão
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncPool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+replica_engine = None
+ReplicaSessionLocal = None
+
+if READ_REPLICA_URL:
+    replica_engine = create_engine(READ_REPLICA_URL, **engine_options(READ_REPLICA_URL))
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+def to_async_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engine = None
+AsyncReplicaSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(to_async_url(DATABASE_URL), **engine_options(DATABASE_URL, is_async=True))
+    # Sem expirar no commit: os objetos são serializados fora do contexto async
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    if READ_REPLICA_URL:
+        async_replica_engine = create_async_engine(
+            to_async_url(READ_REPLICA_URL), **engine_options(READ_REPLICA_URL, is_async=True)
+        )
+        AsyncReplicaSessionLocal = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+
+async def run_db(db, fn, *args, **kwargs):
+    """Executa fn(session, *args) sem bloquear o event loop.
+
+    Com AsyncSession usa run_sync (I/O assíncrono do driver); com Session
+    síncrona roda no threadpool. Assim os serviços são escritos uma única vez.
+    """
+    run_sync = getattr(db, "run_sync", None)
+    if run_sync is not None:
+        return await run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+def _in_transaction(session, fn, *args, **kwargs):
+    try:
+        result = fn(session, *args, **kwargs)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        callbacks = session.info.pop("on_commit", [])
+    for callback in callbacks:
+        callback()
+    return result
+
+async def run_write(db, fn, *args, **kwargs):
+    """Como run_db, mas fn roda numa transação: commit se terminar, rollback se levantar.
+
+    É o único ponto de commit/rollback das escritas, e termina antes de a
+    resposta sair. Os serviços só fazem flush (para mapear IntegrityError e
+    StaleDataError); o que depende do commit é registrado com on_commit.
+    """
+    return await run_db(db, _in_transaction, fn, *args, **kwargs)
+
+def on_commit(db, callback):
+    # Executado por run_write após o commit; descartado no rollback
+    db.info.setdefault("on_commit", []).append(callback)
+
+def session_like(db):
+    """Nova sessão no mesmo engine de db, para trabalho fora da requisição."""
+    if hasattr(db, "run_sync"):
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        return AsyncSession(bind=db.bind, autoflush=False, expire_on_commit=False)
+    return Session(bind=db.get_bind(), autoflush=False)
+
+async def close_db(db):
+    if hasattr(db, "run_sync"):
+        await db.close()
+    else:
+        db.close()
@@ -0,0 +1,28 @@
+from sqlalchemy.exc import IntegrityError
+
+
+UNIQUE_VIOLATION_SQLSTATE = "23505"
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    # psycopg/asyncpg expõem sqlstate, psycopg2 pgcode; o SQLite só a mensagem
+    code = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    if code:
+        return code == UNIQUE_VIOLATION_SQLSTATE
+    return "UNIQUE constraint failed" in str(error.orig)
+
+
+def unique_violation_column(error: IntegrityError, table: str, columns) -> str | None:
+    """Identifica qual coluna única foi violada a partir do erro do driver.
+
+    Postgres cita o índice (ix_clients_email) e a chave ("Key (email)=..."),
+    SQLite cita a coluna ("UNIQUE constraint failed: clients.email").
+    Retorna None se o erro não for de unicidade (NOT NULL, FK, ...).
+    """
+    if not is_unique_violation(error):
+        return None
+    message = str(error.orig)
+    for column in columns:
+        if f"{table}.{column}" in message or f"ix_{table}_{column}" in message or f"({column})=" in message:
+            return column
+    return None
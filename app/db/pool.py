@@ -0,0 +1,60 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStatsMixin:
+    """Conta checkouts, tempo de espera por conexão e timeouts do pool.
+
+    A espera inclui abrir uma conexão nova quando o pool ainda não chegou
+    ao limite; um pool saturado aparece como espera alta e timeouts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+
+class InstrumentedQueuePool(PoolStatsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(PoolStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(engine) -> dict:
+    """Estado atual do pool do engine (sync ou async); vazio se não for instrumentado."""
+    pool = engine.pool
+    if not isinstance(pool, PoolStatsMixin):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "wait_seconds": round(pool.wait_seconds, 6),
+        "max_wait_seconds": round(pool.max_wait_seconds, 6),
+        "timeouts": pool.timeouts,
+    }
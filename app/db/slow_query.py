@@ -0,0 +1,129 @@
+import logging
+import os
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.log import redact
+from app.core.metrics import request_stats
+
+logger = logging.getLogger(__name__)
+
+# SLOW_QUERY_LOG=true liga o registro; desligado, nenhum evento é instalado
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+# Execuções do mesmo SQL numa requisição a partir das quais se acusa N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# No Postgres, roda EXPLAIN das consultas lentas (SELECT) e guarda o plano
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+
+MAX_PARAMS_LENGTH = 500
+
+
+def _params_repr(parameters) -> str:
+    if isinstance(parameters, dict):
+        parameters = redact(parameters)
+    text = repr(parameters)
+    return text if len(text) <= MAX_PARAMS_LENGTH else text[:MAX_PARAMS_LENGTH] + "..."
+
+
+class SlowQueryRecorder:
+    """Registra consultas acima do limite e SQL repetido na mesma requisição.
+
+    Escuta os eventos de cursor de todos os Engines. As consultas lentas vão
+    para o log "app.db.slow_query" (WARNING) e para `recent`, um buffer com
+    as últimas ocorrências. A detecção de N+1 usa o RequestStats da
+    requisição, definido pelo MetricsMiddleware.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        repeat_threshold: int = N_PLUS_ONE_THRESHOLD,
+        explain: bool = SLOW_QUERY_EXPLAIN,
+        max_entries: int = 200,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.repeat_threshold = repeat_threshold
+        self.explain = explain
+        self.recent: deque = deque(maxlen=max_entries)
+        self.repeated: deque = deque(maxlen=max_entries)
+        self.enabled = False
+
+    def enable(self):
+        if not self.enabled:
+            event.listen(Engine, "before_cursor_execute", self._before)
+            event.listen(Engine, "after_cursor_execute", self._after)
+            event.listen(Engine, "handle_error", self._error)
+            self.enabled = True
+        return self
+
+    def disable(self):
+        if self.enabled:
+            event.remove(Engine, "before_cursor_execute", self._before)
+            event.remove(Engine, "after_cursor_execute", self._after)
+            event.remove(Engine, "handle_error", self._error)
+            self.enabled = False
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _error(self, exception_context):
+        starts = exception_context.connection.info.get("slow_query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        stats = request_stats.get()
+        if stats is not None:
+            stats.statements[statement] += 1
+            if stats.statements[statement] == self.repeat_threshold:
+                self._record_repeated(stats.path, statement)
+        if duration >= self.threshold:
+            self._record_slow(conn, statement, parameters, duration, executemany, stats)
+
+    def _record_repeated(self, path: str, statement: str):
+        entry = {"request": path, "statement": statement, "count": self.repeat_threshold}
+        self.repeated.append(entry)
+        logger.warning("SQL repetido na requisição (possível N+1)", extra=entry)
+
+    def _record_slow(self, conn, statement, parameters, duration, executemany, stats):
+        entry = {
+            "statement": statement,
+            "params": _params_repr(parameters),
+            "duration_ms": round(duration * 1000, 2),
+            "request": stats.path if stats is not None else None,
+            "plan": None,
+        }
+        if self.explain and not executemany and conn.dialect.name == "postgresql" and statement.lstrip()[:6].upper() == "SELECT":
+            entry["plan"] = self._explain(conn, statement, parameters)
+        self.recent.append(entry)
+        logger.warning("Consulta lenta", extra=entry)
+
+    def _explain(self, conn, statement, parameters):
+        # Cursor DBAPI separado: não dispara eventos nem consome o resultado
+        # original. O savepoint evita que uma falha aborte a transação.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute("EXPLAIN " + statement, parameters)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                return f"EXPLAIN falhou: {e}"
+            finally:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            return f"EXPLAIN falhou: {e}"
+        finally:
+            cursor.close()
+
+
+slow_query_log = SlowQueryRecorder()
@@ -1,9 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from app.routers import auth
 from app.routers import client
+from app.routers import metrics
+from app.core.security import shutdown_hash_pool
+from app.db.connection import async_engine, async_replica_engine
+from app.db.slow_query import SLOW_QUERY_LOG, slow_query_log
+from app.core.log import setup_logging, shutdown_logging
+from app.core.metrics import METRICS_ENABLED, MetricsMiddleware
 
-app = FastAPI(title="Lu Estilo API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    yield
+    shutdown_hash_pool()
+    shutdown_logging()
+    for engine in (async_engine, async_replica_engine):
+        if engine is not None:
+            await engine.dispose()
+
+app = FastAPI(title="Lu Estilo API", lifespan=lifespan)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if SLOW_QUERY_LOG:
+    slow_query_log.enable()
 
 def custom_openapi():
     if app.openapi_schema:
@@ -30,4 +52,6 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 app.include_router(auth.router)
-app.include_router(client.router)
\ No newline at end of file
+app.include_router(client.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
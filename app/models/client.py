@@ -1,11 +1,52 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import DDL, Column, Index, Integer, String, event
 from app.db.base import Base
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Sustenta a ordenação/paginação por nome (nome não é único, id desempata)
+        Index("ix_clients_name_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     cpf = Column(String, unique=True, index=True, nullable=False)
     phone = Column(String, nullable=True)
+    # Incrementado a cada alteração; base do controle de concorrência otimista
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
+# Índices de busca textual: FTS5 no SQLite (desenvolvimento/testes) e
+# pg_trgm no Postgres. Em produção as migrações criam os mesmos objetos.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5("
+    "name, email, content='clients', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+    "INSERT INTO clients_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+    "INSERT INTO clients_fts(clients_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN "
+    "INSERT INTO clients_fts(clients_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO clients_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+]
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_clients_name_trgm ON clients USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_clients_email_trgm ON clients USING gin (email gin_trgm_ops)",
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Client.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Client.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Client.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS clients_fts").execute_if(dialect="sqlite"),
+)
@@ -1,28 +1,34 @@
+import os
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.db.connection import SessionLocal
 from app.schemas.user import UserCreate, UserOut
 from app.schemas.user import UserLogin
 from app.schemas.token import Token
 from app.services import auth
+from app.core.dependencies import get_db
+from app.core.rate_limit import RateLimit
 from app.core.security import create_access_token, create_refresh_token, decode_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Limites no formato "quantidade/second|minute|hour"
+login_rate_limit = RateLimit(
+    "login",
+    per_ip=os.getenv("LOGIN_RATE_LIMIT_PER_IP", "20/minute"),
+    per_account=os.getenv("LOGIN_RATE_LIMIT_PER_ACCOUNT", "5/minute"),
+)
+register_rate_limit = RateLimit(
+    "register",
+    per_ip=os.getenv("REGISTER_RATE_LIMIT_PER_IP", "10/minute"),
+)
 
-@router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    return auth.register_user(user, db)
+@router.post("/register", response_model=UserOut, dependencies=[Depends(register_rate_limit)])
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    return await auth.register_user(user, db)
 
-@router.post("/login", response_model=Token)
-def login(form: UserLogin, db: Session = Depends(get_db)):
-    user = auth.authenticate_user(form.email, form.password, db)
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
+async def login(form: UserLogin, db: Session = Depends(get_db)):
+    user = await auth.authenticate_user(form.email, form.password, db)
     if not user:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
     
@@ -1,72 +1,193 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, Query
 from typing import Optional
 from typing import List
-from app.db.connection import SessionLocal
-from app.models.client import Client
-from app.schemas.client import ClientCreate, ClientOut, ClientUpdate
-from app.core.dependencies import get_current_user
+from app.schemas.client import (
+    BulkImportJobOut, BulkWriteOut, ClientBatchGet, ClientBatchOut, ClientBulkUpdate, ClientCreate, ClientOut,
+    ClientPatch, ClientSelection, ClientUpdate,
+)
+from app.core.dependencies import get_current_user, get_db, get_read_db
+from app.db.connection import run_db, run_write
 from app.models.user import User
+from app.services import client as client_service
+from app.services import bulk_import
+from app.services import export
+from app.core.pagination import SORT_PATTERN
+from app.core.conditional import client_etag, etag_matches, list_etag, not_modified
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
-def get_db():
-    db = SessionLocal()
+def sparse_fields(
+    fields: Optional[str] = Query(None, description="Campos a retornar, ex.: id,name"),
+) -> Optional[List[str]]:
+    return client_service.parse_fields(fields)
+
+# Os endpoints são assíncronos e delegam o acesso ao banco para
+# app.services via run_db, que funciona com Session e AsyncSession.
+
+@router.post("/", response_model=ClientOut)
+async def create_client(data: ClientCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return await run_write(db, client_service.create_client, data)
+
+BULK_FORMATS = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+
+@router.post("/bulk", response_model=BulkImportJobOut)
+async def bulk_import_clients(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = BULK_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Use text/csv ou application/x-ndjson")
+
+    job = bulk_import.ImportJob()
+    upload, lines = await bulk_import.spool_upload(request.stream())
+    bulk_import.import_jobs.set(job.id, job)
+    rows = lines - 1 if fmt == "csv" else lines  # sem o cabeçalho
+
+    # Arquivos grandes são validados e importados após a resposta; consulte GET /clients/bulk/{id}
+    if rows > bulk_import.BULK_IMPORT_SYNC_ROWS:
+        background_tasks.add_task(bulk_import.run_import_job, db, job, upload, fmt)
+        response.status_code = 202
+        return job
     try:
-        yield db
+        return await bulk_import.import_upload(db, upload, fmt, job)
     finally:
-        db.close()
+        upload.close()
 
-@router.post("/", response_model=ClientOut)
-def create_client(data: ClientCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    if db.query(Client).filter((Client.email == data.email) | (Client.cpf == data.cpf)).first():
-        raise HTTPException(status_code=400, detail="Email ou CPF já cadastrado")
-    client = Client(**data.dict())
-    db.add(client)
-    db.commit()
-    db.refresh(client)
-    return client
+@router.get("/bulk/{job_id}", response_model=BulkImportJobOut)
+async def bulk_import_status(job_id: str, user=Depends(get_current_user)):
+    job = bulk_import.import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return job
+
+@router.post("/bulk-update", response_model=BulkWriteOut)
+async def bulk_update_clients(data: ClientBulkUpdate, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return await run_write(db, client_service.bulk_update_clients, data)
+
+@router.post("/bulk-delete", response_model=BulkWriteOut)
+async def bulk_delete_clients(data: ClientSelection, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return await run_write(db, client_service.bulk_delete_clients, data)
+
+@router.get("/export")
+async def export_clients(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    name: Optional[str] = Query(None),
+    email: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return StreamingResponse(
+        export.iter_export(db, format, name, email),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="clients.{format}"'},
+    )
+
+@router.get("/search", response_model=List[ClientOut])
+async def search_clients(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return await run_db(db, client_service.search_clients, q, limit)
+
+@router.post("/batch-get", response_model=ClientBatchOut)
+async def batch_get_clients(data: ClientBatchGet, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    rows, missing = await run_db(db, client_service.batch_get_clients, data.ids)
+    return FastJSONResponse({"clients": [row._asdict() for row in rows], "missing": missing})
+
+@router.get("/by-cpf/{cpf}", response_model=ClientOut)
+async def get_client_by_cpf(cpf: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return await run_db(db, client_service.get_client_by_cpf, cpf)
 
 @router.get("/{client_id}", response_model=ClientOut)
-def get_client(client_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    client = db.query(Client).filter(Client.id == client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+async def get_client(
+    client_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    fields: Optional[List[str]] = Depends(sparse_fields),
+    db: Session = Depends(get_read_db),
+    user=Depends(get_current_user),
+):
+    if fields:
+        client = await client_service.read_client_fields(db, client_id, fields)
+    else:
+        client = await client_service.read_client(db, client_id)
+    etag = client_etag(client)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    if fields:
+        return FastJSONResponse({key: getattr(client, key) for key in fields}, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return client
 
 @router.put("/{client_id}", response_model=ClientOut)
-def update_client(client_id: int, data: ClientUpdate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    client = db.query(Client).filter(Client.id == client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    for key, value in data.dict(exclude_unset=True).items():
-        setattr(client, key, value)
-    db.commit()
-    db.refresh(client)
+async def update_client(
+    client_id: int,
+    data: ClientUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    client = await run_write(db, client_service.update_client, client_id, data, if_match)
+    response.headers["ETag"] = client_etag(client)
+    return client
+
+@router.patch("/{client_id}", response_model=ClientOut, responses={409: {"description": "Versão desatualizada"}})
+async def patch_client(
+    client_id: int,
+    data: ClientPatch,
+    response: Response,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    client = await run_write(db, client_service.patch_client, client_id, data)
+    response.headers["ETag"] = client_etag(client)
     return client
 
 @router.delete("/{client_id}")
-def delete_client(client_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    client = db.query(Client).filter(Client.id == client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    db.delete(client)
-    db.commit()
+async def delete_client(
+    client_id: int,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    await run_write(db, client_service.delete_client, client_id, if_match)
     return {"detail": "Cliente removido com sucesso"}
 
 @router.get("/", response_model=List[ClientOut])
-def list_clients(
+async def list_clients(
     name: Optional[str] = Query(None),
     email: Optional[str] = Query(None),
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor retornado em X-Next-Cursor"),
+    sort: str = Query("id", pattern=SORT_PATTERN),
+    count: Optional[str] = Query(None, pattern="^(estimated|exact)$", description="Envia X-Total-Count"),
+    if_none_match: Optional[str] = Header(None),
+    fields: Optional[List[str]] = Depends(sparse_fields),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(Client)
-    if name:
-        query = query.filter(Client.name.ilike(f"%{name}%"))
-    if email:
-        query = query.filter(Client.email.ilike(f"%{email}%"))
-    return query.offset(skip).limit(limit).all()
\ No newline at end of file
+    rows, cursor = await run_db(db, client_service.list_clients, name, email, skip, limit, after, sort, fields)
+    headers = {"X-Next-Cursor": cursor} if cursor else {}
+    etag = list_etag(rows)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    if count:
+        headers["X-Total-Count"] = await run_db(db, client_service.count_clients, name, email, count)
+    # Linhas lidas por coluna e serializadas direto, sem revalidar em ClientOut
+    if fields:
+        content = [{key: row._mapping[key] for key in fields} for row in rows]
+    else:
+        content = [row._asdict() for row in rows]
+    return FastJSONResponse(content, headers={"ETag": etag, **headers})
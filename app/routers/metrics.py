@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.dependencies import principal_cache, recent_writers
+from app.core.metrics import render_metrics
+from app.core.security import token_cache
+from app.db import connection
+from app.db.pool import pool_stats
+from app.services.bulk_import import import_jobs
+from app.services.client import client_cache
+
+router = APIRouter(tags=["Metrics"])
+
+CACHES = {
+    "client": client_cache, "principal": principal_cache, "token": token_cache,
+    "import_jobs": import_jobs, "recent_writers": recent_writers,
+}
+
+def pools() -> dict:
+    engines = {
+        "primary": connection.engine,
+        "replica": connection.replica_engine,
+        "primary_async": connection.async_engine,
+        "replica_async": connection.async_replica_engine,
+    }
+    return {name: pool_stats(engine) for name, engine in engines.items() if engine is not None}
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(CACHES, pools()), media_type="text/plain; version=0.0.4")
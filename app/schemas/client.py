@@ -1,21 +1,105 @@
-from pydantic import BaseModel, EmailStr, constr
+import re
+from pydantic import BaseModel, EmailStr, constr, field_validator, model_validator
+
+CPF_PUNCTUATION = re.compile(r"[.\-/\s]")
+
+def normalize_cpf(cpf: str) -> str:
+    # Forma canônica: sem pontuação (123.456.789-00 -> 12345678900)
+    return CPF_PUNCTUATION.sub("", cpf)
+
+def reject_null(value):
+    # Campo opcional na requisição, mas a coluna é NOT NULL: null explícito é 422
+    if value is None:
+        raise ValueError("não pode ser nulo")
+    return value
 
 class ClientBase(BaseModel):
     name: str
     email: EmailStr
-    cpf: constr(min_length=11, max_length=14)  # aceita CPF com ou sem pontuação
+    cpf: str
     phone: str | None = None
 
+    @field_validator("email")
+    @classmethod
+    def lower_email(cls, value: str) -> str:
+        return value.lower()
+
 class ClientCreate(ClientBase):
-    pass
+    # Aceita CPF com ou sem pontuação; a validação vale para a forma canônica.
+    # Só na entrada: linhas antigas fora do formato continuam legíveis.
+    cpf: constr(pattern=r"^\d{11}$")
+
+    @field_validator("cpf", mode="before")
+    @classmethod
+    def canonical_cpf(cls, value):
+        return normalize_cpf(value) if isinstance(value, str) else value
 
 class ClientUpdate(BaseModel):
     name: str | None = None
     email: EmailStr | None = None
     phone: str | None = None
 
+    _not_null = field_validator("name", "email")(reject_null)
+
+    @field_validator("email")
+    @classmethod
+    def lower_email(cls, value: str) -> str:
+        return value.lower()
+
+class ClientPatch(ClientUpdate):
+    # Versão lida pelo cliente; a alteração só é aplicada se ainda for a atual
+    version: int
+
 class ClientOut(ClientBase):
     id: int
+    version: int
 
     class Config:
         from_attributes = True  # pydantic v2
+
+class ClientBatchGet(BaseModel):
+    ids: list[int]
+
+class ClientBatchOut(BaseModel):
+    clients: list[ClientOut]
+    missing: list[int]
+
+class ClientSelection(BaseModel):
+    # Lista de ids ou filtro com a mesma semântica de GET /clients/
+    ids: list[int] | None = None
+    name: str | None = None
+    email: str | None = None
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def require_target(self):
+        if self.ids is None and not (self.name or self.email):
+            raise ValueError("Informe ids ou um filtro (name/email)")
+        return self
+
+class ClientBulkChanges(BaseModel):
+    name: str | None = None
+    phone: str | None = None
+
+    _name_not_null = field_validator("name")(reject_null)
+
+class ClientBulkUpdate(ClientSelection):
+    changes: ClientBulkChanges
+
+class BulkWriteOut(BaseModel):
+    affected: int
+    dry_run: bool
+
+class BulkImportRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportJobOut(BaseModel):
+    id: str
+    status: str
+    total: int
+    inserted: int
+    errors: list[BulkImportRowError]
+
+    class Config:
+        from_attributes = True
@@ -1,27 +1,55 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from functools import partial
+from app.db.connection import on_commit, run_db, run_write
+from app.core.dependencies import invalidate_principal
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import hash_password, verify_password, create_access_token, create_refresh_token
+from app.core.security import hash_password_async, verify_and_update_password_async
 from fastapi import HTTPException, status
 
-def register_user(user_data: UserCreate, db: Session):
-    existing = db.query(User).filter(User.email == user_data.email).first()
-    if existing:
+def get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def save_user(db: Session, user: User):
+    db.add(user)
+    db.flush()
+    # Já carregado; fora da sessão o objeto não expira no commit
+    db.expunge(user)
+    return user
+
+def insert_user(db: Session, values: dict):
+    # INSERT ... RETURNING; o índice único de users.email rejeita duplicatas
+    try:
+        user = db.execute(insert(User).values(**values).returning(User)).scalar_one()
+    except IntegrityError:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
-    
-    new_user = User(
+    db.expunge(user)
+    # Insert fora do unit of work não dispara os eventos do ORM
+    on_commit(db, partial(invalidate_principal, user.email))
+    return user
+
+# O bcrypt roda no pool de processos e as consultas via run_db,
+# para que nenhuma das duas etapas bloqueie o event loop.
+async def register_user(user_data: UserCreate, db: Session):
+    values = dict(
         name=user_data.name,
         email=user_data.email,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         role=user_data.role
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_write(db, insert_user, values)
 
-def authenticate_user(email: str, password: str, db: Session):
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(email: str, password: str, db: Session):
+    user = await run_db(db, get_user_by_email, email)
+    if not user:
+        return None
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Custo do bcrypt mudou: regrava o hash de forma transparente
+        user.hashed_password = new_hash
+        user = await run_write(db, save_user, user)
     return user
@@ -0,0 +1,251 @@
+import codecs
+import csv
+import json
+import os
+import tempfile
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.db.connection import close_db, run_write, session_like
+from app.models.client import Client
+from app.schemas.client import ClientCreate
+from app.services.client import duplicate_detail
+
+# Linhas verificadas/inseridas por lote
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+# Acima deste número de linhas a importação vira um job em segundo plano
+BULK_IMPORT_SYNC_ROWS = int(os.getenv("BULK_IMPORT_SYNC_ROWS", "1000"))
+# O corpo recebido fica em memória até este tamanho; acima disso vai para disco
+BULK_IMPORT_SPOOL_BYTES = int(os.getenv("BULK_IMPORT_SPOOL_BYTES", str(1024 * 1024)))
+READ_CHUNK_BYTES = 64 * 1024
+# Status dos jobs ficam disponíveis por este tempo após a criação
+BULK_IMPORT_JOB_TTL_SECONDS = float(os.getenv("BULK_IMPORT_JOB_TTL_SECONDS", "3600"))
+
+import_jobs = TTLCache(max_size=1000, ttl=BULK_IMPORT_JOB_TTL_SECONDS)
+
+
+@dataclass
+class ImportJob:
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "pending"  # pending | running | done | failed
+    total: int = 0
+    inserted: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row: int, error: str):
+        self.errors.append({"row": row, "error": error})
+
+
+async def _iter_lines(stream):
+    """Linhas do corpo já decodificadas, com o "\\n" final preservado."""
+    # utf-8-sig descarta o BOM que o Excel grava no início do CSV
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    try:
+        async for chunk in stream:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line + "\n"
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="O arquivo deve estar codificado em UTF-8")
+    if buffer:
+        yield buffer
+
+
+class _LineFeed:
+    """Iterador de linhas alimentado aos poucos por _iter_csv_records.
+
+    Um único csv.reader consome o arquivo inteiro, então campos entre aspas
+    com quebra de linha são lidos como um só valor.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_csv_records(stream):
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header = None
+    row = 0
+    quotes = 0
+    async for line in _iter_lines(stream):
+        feed.lines.append(line)
+        # Número ímpar de aspas: o campo continua na próxima linha
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            if header is None:
+                header = [column.strip() for column in values]
+                continue
+            row += 1
+            # Células vazias equivalem a campos ausentes
+            yield row, {key: value for key, value in zip(header, values) if value != ""}
+    if feed.lines:
+        # Aspas abertas até o fim do arquivo
+        yield row + 1, None
+
+
+async def _iter_records(stream, fmt: str):
+    """Produz (número da linha, dict) a partir de um corpo CSV ou NDJSON."""
+    if fmt == "csv":
+        async for record in _iter_csv_records(stream):
+            yield record
+        return
+    row = 0
+    async for line in _iter_lines(stream):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row, None
+            continue
+        yield row, record if isinstance(record, dict) else None
+
+
+async def spool_upload(stream):
+    """Copia o corpo para um arquivo temporário; retorna (arquivo, número de linhas).
+
+    Nada é validado aqui: a contagem de linhas só decide entre importar na
+    requisição ou em segundo plano.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=BULK_IMPORT_SPOOL_BYTES)
+    lines = 0
+    last = b"\n"
+    async for chunk in stream:
+        if chunk:
+            upload.write(chunk)
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    upload.seek(0)
+    return upload, lines
+
+
+async def _iter_upload(upload):
+    while chunk := upload.read(READ_CHUNK_BYTES):
+        yield chunk
+
+
+def _validate(job: ImportJob, row: int, record: dict | None) -> ClientCreate | None:
+    # Erros ficam registrados no job
+    job.total += 1
+    if record is None:
+        job.add_error(row, "Linha inválida")
+        return None
+    try:
+        return ClientCreate(**record)
+    except ValidationError as e:
+        job.add_error(row, "; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+        ))
+        return None
+
+
+def _insert_one_by_one(db: Session, job: ImportJob, batch: list):
+    # Fallback quando outro processo inseriu duplicatas no meio do lote
+    for row, data in batch:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Client), [data.dict()])
+            job.inserted += 1
+        except IntegrityError as e:
+            detail = duplicate_detail(e)
+            if detail is None:
+                raise
+            job.add_error(row, detail)
+
+
+def insert_batch(db: Session, job: ImportJob, batch: list):
+    """Insere um lote; o commit é de run_write, um por lote."""
+    # Uma consulta por lote para as duplicatas já gravadas
+    emails = {data.email for _, data in batch}
+    cpfs = {data.cpf for _, data in batch}
+    existing = db.execute(
+        select(Client.email, Client.cpf).where(or_(Client.email.in_(emails), Client.cpf.in_(cpfs)))
+    ).all()
+    taken_emails = {email for email, _ in existing}
+    taken_cpfs = {cpf for _, cpf in existing}
+
+    pending = []
+    for row, data in batch:
+        if data.email in taken_emails:
+            job.add_error(row, "Email já cadastrado")
+        elif data.cpf in taken_cpfs:
+            job.add_error(row, "CPF já cadastrado")
+        else:
+            taken_emails.add(data.email)
+            taken_cpfs.add(data.cpf)
+            pending.append((row, data))
+
+    if not pending:
+        return
+    try:
+        # executemany: INSERT multi-linha no Postgres (insertmanyvalues)
+        with db.begin_nested():
+            db.execute(insert(Client), [data.dict() for _, data in pending])
+        job.inserted += len(pending)
+    except IntegrityError:
+        _insert_one_by_one(db, job, pending)
+
+
+async def import_upload(db, upload, fmt: str, job: ImportJob):
+    """Lê, valida e insere em lotes de BULK_IMPORT_BATCH_SIZE.
+
+    Só o lote corrente fica em memória, qualquer que seja o tamanho do arquivo.
+    """
+    job.status = "running"
+    batch = []
+    async for row, record in _iter_records(_iter_upload(upload), fmt):
+        data = _validate(job, row, record)
+        if data is not None:
+            batch.append((row, data))
+        if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+            await run_write(db, insert_batch, job, batch)
+            batch = []
+    if batch:
+        await run_write(db, insert_batch, job, batch)
+    job.errors.sort(key=lambda e: e["row"])
+    job.status = "done"
+    return job
+
+
+async def run_import_job(db, job: ImportJob, upload, fmt: str):
+    # Executa após a resposta, com uma sessão própria no mesmo banco da requisição
+    session = session_like(db)
+    try:
+        await import_upload(session, upload, fmt, job)
+    except HTTPException as e:
+        job.status = "failed"
+        job.add_error(0, e.detail)
+    except Exception as e:
+        job.status = "failed"
+        job.add_error(0, str(e))
+    finally:
+        upload.close()
+        await close_db(session)
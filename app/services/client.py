@@ -1,25 +1,339 @@
+import os
+import re
+import threading
+from functools import partial
+from sqlalchemy import delete, func, insert, or_, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.client import Client
-from app.schemas.client import ClientCreate
+from app.schemas.client import (
+    ClientBulkUpdate, ClientCreate, ClientOut, ClientPatch, ClientSelection, ClientUpdate, normalize_cpf
+)
+from app.core.pagination import keyset_paginate, next_cursor
+from app.db.errors import unique_violation_column
+from app.core.conditional import client_etag, etag_matches
+from app.core.cache import CacheBackend, TTLCache
+from app.db.connection import on_commit, run_db
+
+# Máximo de ids aceitos por POST /clients/batch-get
+BATCH_GET_MAX_IDS = int(os.getenv("BATCH_GET_MAX_IDS", "500"))
+
+# Ids por UPDATE/DELETE nas operações em massa
+BULK_WRITE_CHUNK_SIZE = int(os.getenv("BULK_WRITE_CHUNK_SIZE", "500"))
+
+# Contagens com filtro param neste valor ("10000+")
+COUNT_CAP = int(os.getenv("CLIENT_COUNT_CAP", "10000"))
+
+# Cache de leitura de clientes por id (ClientOut), invalidado nas escritas
+CLIENT_CACHE_TTL_SECONDS = float(os.getenv("CLIENT_CACHE_TTL_SECONDS", "60"))
+CLIENT_CACHE_MAX_SIZE = int(os.getenv("CLIENT_CACHE_MAX_SIZE", "10000"))
+
+client_cache: CacheBackend = TTLCache(max_size=CLIENT_CACHE_MAX_SIZE, ttl=CLIENT_CACHE_TTL_SECONDS)
+
+# Gerações de invalidação, em faixas por id: o read-through só grava no
+# cache se nenhuma escrita invalidou o id entre o miss e o set. Sem isso, um
+# leitor lento regravaria a linha antiga depois da invalidação.
+_CACHE_GENERATION_SLOTS = 4096
+_cache_generations = [0] * _CACHE_GENERATION_SLOTS
+_cache_generation_lock = threading.Lock()
+
+def invalidate_client(client_id: int):
+    # Registrada com on_commit pelas escritas: roda só após o commit
+    with _cache_generation_lock:
+        _cache_generations[client_id % _CACHE_GENERATION_SLOTS] += 1
+        client_cache.delete(client_id)
+
+def _cache_generation(client_id: int) -> int:
+    return _cache_generations[client_id % _CACHE_GENERATION_SLOTS]
+
+def _fill_client_cache(client_id: int, client: ClientOut, generation: int):
+    with _cache_generation_lock:
+        if _cache_generation(client_id) == generation:
+            client_cache.set(client_id, client)
+
+# Mensagens das violações de índice único em clients
+DUPLICATE_DETAILS = {"email": "Email já cadastrado", "cpf": "CPF já cadastrado"}
+
+def duplicate_detail(error: IntegrityError) -> str | None:
+    """Mensagem para email/CPF duplicado; None para outros erros de integridade."""
+    column = unique_violation_column(error, "clients", DUPLICATE_DETAILS)
+    return DUPLICATE_DETAILS.get(column)
+
+def raise_for_duplicate(error: IntegrityError):
+    # Só duplicatas viram 400; os demais erros seguem como estão
+    detail = duplicate_detail(error)
+    if detail is None:
+        raise error
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail) from error
 
 def create_client(db: Session, client_data: ClientCreate) -> Client:
-    # Verificar se email já existe
-    if db.query(Client).filter(Client.email == client_data.email).first():
+    # Um único INSERT ... RETURNING: os índices únicos de email e CPF
+    # rejeitam duplicatas, inclusive entre requisições concorrentes
+    try:
+        new_client = db.execute(
+            insert(Client).values(**client_data.dict()).returning(Client)
+        ).scalar_one()
+    except IntegrityError as e:
+        raise_for_duplicate(e)
+    # Fora da sessão o objeto não expira no commit (evita o SELECT de refresh)
+    db.expunge(new_client)
+    on_commit(db, partial(invalidate_client, new_client.id))
+    return new_client
+
+def get_client(db: Session, client_id: int) -> Client:
+    client = db.query(Client).filter(Client.id == client_id).first()
+    if not client:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return client
+
+async def read_client(db: Session, client_id: int) -> ClientOut:
+    # Read-through: só consulta o banco quando o cliente não está em cache
+    cached = client_cache.get(client_id)
+    if cached is not None:
+        return cached
+    generation = _cache_generation(client_id)
+    client = ClientOut.model_validate(await run_db(db, get_client, client_id))
+    # Leituras da réplica podem estar atrasadas: não alimentam o cache
+    if not db.info.get("replica"):
+        _fill_client_cache(client_id, client, generation)
+    return client
+
+def batch_get_clients(db: Session, ids: list[int]):
+    """Busca vários clientes com um único WHERE id IN (...).
+
+    Retorna (linhas na ordem pedida, ids não encontrados).
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"Máximo de {BATCH_GET_MAX_IDS} ids por requisição")
+    found = {row.id: row for row in db.query(*CLIENT_COLUMNS).filter(Client.id.in_(ids))} if ids else {}
+    return [found[i] for i in ids if i in found], [i for i in ids if i not in found]
+
+def get_client_by_cpf(db: Session, cpf: str) -> Client:
+    # Igualdade sobre a forma canônica: servida pelo índice único ix_clients_cpf
+    client = db.query(Client).filter(Client.cpf == normalize_cpf(cpf)).first()
+    if not client:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return client
+
+def get_client_columns(db: Session, client_id: int, fields: list[str]):
+    row = db.query(*columns_for(fields, "id", "version")).filter(Client.id == client_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return row
+
+async def read_client_fields(db: Session, client_id: int, fields: list[str]):
+    # Aproveita o cache se o cliente já estiver lá; senão lê só as colunas pedidas
+    cached = client_cache.get(client_id)
+    if cached is not None:
+        return cached
+    return await run_db(db, get_client_columns, client_id, fields)
+
+VERSION_CONFLICT = "Cliente alterado por outra requisição"
+
+def check_if_match(client: Client, if_match: str | None):
+    # If-Match ausente mantém o comportamento incondicional
+    if if_match is not None and not etag_matches(if_match, client_etag(client), weak=False):
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=VERSION_CONFLICT)
+
+def update_client(db: Session, client_id: int, client_data: ClientUpdate, if_match: str | None = None) -> Client:
+    client = get_client(db, client_id)
+    check_if_match(client, if_match)
+    for key, value in client_data.dict(exclude_unset=True).items():
+        setattr(client, key, value)
+    # O ORM inclui "AND version = ?" no UPDATE (version_id_col)
+    try:
+        db.flush()
+    except StaleDataError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=VERSION_CONFLICT)
+    except IntegrityError as e:
+        raise_for_duplicate(e)
+    # Valores e nova versão já estão no objeto; fora da sessão não expira no commit
+    db.expunge(client)
+    on_commit(db, partial(invalidate_client, client_id))
+    return client
+
+def patch_client(db: Session, client_id: int, client_data: ClientPatch) -> Client:
+    # Um único UPDATE ... WHERE id = ? AND version = ? RETURNING
+    values = client_data.dict(exclude_unset=True, exclude={"version"})
+    statement = (
+        update(Client)
+        .where(Client.id == client_id, Client.version == client_data.version)
+        .values(**values, version=Client.version + 1)
+        .returning(Client)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        client = db.execute(statement).scalar_one_or_none()
+    except IntegrityError as e:
+        raise_for_duplicate(e)
+    if client is None:
+        # Só no caminho de erro: distingue cliente inexistente de versão desatualizada
+        if db.query(Client.id).filter(Client.id == client_id).first() is None:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=VERSION_CONFLICT)
+    db.expunge(client)
+    on_commit(db, partial(invalidate_client, client_id))
+    return client
+
+def delete_client(db: Session, client_id: int, if_match: str | None = None):
+    client = get_client(db, client_id)
+    check_if_match(client, if_match)
+    db.delete(client)
+    try:
+        db.flush()
+    except StaleDataError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=VERSION_CONFLICT)
+    on_commit(db, partial(invalidate_client, client_id))
+
+SORT_COLUMNS = {"id": Client.id, "name": Client.name, "email": Client.email}
+# Colunas de ClientOut, lidas direto como tuplas (sem instanciar entidades)
+CLIENT_COLUMNS = (Client.id, Client.name, Client.email, Client.cpf, Client.phone, Client.version)
+CLIENT_FIELDS = [column.key for column in CLIENT_COLUMNS]
+
+def parse_fields(fields: str | None) -> list[str] | None:
+    """Valida ?fields=id,name contra os campos de ClientOut."""
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in CLIENT_FIELDS]
+    if unknown or not names:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email já cadastrado"
+            status_code=422,
+            detail=f"Campos inválidos em fields: {', '.join(unknown) or '(vazio)'}",
         )
-    
-    # Verificar se CPF já existe
-    if db.query(Client).filter(Client.cpf == client_data.cpf).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="CPF já cadastrado"
+    return names
+
+def columns_for(fields: list[str] | None, *required: str):
+    # Só as colunas pedidas, mais as usadas internamente (ETag, cursor)
+    if fields is None:
+        return CLIENT_COLUMNS
+    wanted = set(fields) | set(required)
+    return tuple(column for column in CLIENT_COLUMNS if column.key in wanted)
+
+def filter_clients(query, name: str | None = None, email: str | None = None):
+    if name:
+        query = query.filter(Client.name.ilike(f"%{name}%"))
+    if email:
+        query = query.filter(Client.email.ilike(f"%{email}%"))
+    return query
+
+def list_clients(
+    db: Session,
+    name: str | None = None,
+    email: str | None = None,
+    skip: int = 0,
+    limit: int = 10,
+    after: str | None = None,
+    sort: str = "id",
+    fields: list[str] | None = None,
+):
+    """Retorna (linhas da página, cursor da próxima página ou None)."""
+    columns = columns_for(fields, "id", "version", sort.lstrip("-"))
+    query = filter_clients(db.query(*columns), name, email)
+    query = keyset_paginate(query, sort, SORT_COLUMNS, Client.id, after)
+    # Com cursor, a paginação por offset é ignorada
+    if after is None:
+        query = query.offset(skip)
+    clients = query.limit(limit + 1).all()
+    return clients[:limit], next_cursor(clients, sort, limit)
+
+def count_clients(db: Session, name: str | None = None, email: str | None = None, mode: str = "estimated") -> str:
+    """Total para o cabeçalho X-Total-Count.
+
+    Com filtro, conta no máximo COUNT_CAP + 1 linhas e responde "N+" acima
+    disso. Sem filtro, "estimated" usa pg_class.reltuples no Postgres
+    (estatística mantida pelo ANALYZE/autovacuum); nos demais bancos, ou
+    com "exact", faz o count(*) completo.
+    """
+    if name or email:
+        capped = filter_clients(db.query(Client.id), name, email).limit(COUNT_CAP + 1).subquery()
+        total = db.query(func.count()).select_from(capped).scalar()
+        return f"{COUNT_CAP}+" if total > COUNT_CAP else str(total)
+
+    if mode == "estimated" and db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'clients'::regclass")
+        ).scalar()
+        # -1 indica tabela ainda não analisada: cai para a contagem exata
+        if estimate is not None and estimate >= 0:
+            return str(estimate)
+    return str(db.query(func.count(Client.id)).scalar())
+
+def _target_ids(db: Session, selection: ClientSelection) -> list[int]:
+    if selection.ids is not None:
+        return list(dict.fromkeys(selection.ids))
+    query = filter_clients(db.query(Client.id), selection.name, selection.email)
+    return [row.id for row in query.order_by(Client.id)]
+
+def _bulk_write(db: Session, selection: ClientSelection, statement) -> dict:
+    """Aplica statement (UPDATE/DELETE) em blocos de ids, numa única transação."""
+    ids = _target_ids(db, selection)
+    affected = 0
+    for start in range(0, len(ids), BULK_WRITE_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_WRITE_CHUNK_SIZE]
+        if selection.dry_run:
+            affected += db.query(func.count(Client.id)).filter(Client.id.in_(chunk)).scalar()
+        else:
+            result = db.execute(
+                statement.where(Client.id.in_(chunk)).execution_options(synchronize_session=False)
+            )
+            affected += result.rowcount
+    if not selection.dry_run:
+        for client_id in ids:
+            on_commit(db, partial(invalidate_client, client_id))
+    return {"affected": affected, "dry_run": selection.dry_run}
+
+def bulk_update_clients(db: Session, data: ClientBulkUpdate) -> dict:
+    values = data.changes.dict(exclude_unset=True)
+    if not values:
+        raise HTTPException(status_code=422, detail="Nenhuma alteração informada")
+    return _bulk_write(db, data, update(Client).values(**values, version=Client.version + 1))
+
+def bulk_delete_clients(db: Session, data: ClientSelection) -> dict:
+    return _bulk_write(db, data, delete(Client))
+
+def _fts_query(q: str) -> str:
+    # Cada termo vira um prefixo entre aspas, evitando a sintaxe de operadores do FTS5
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", q))
+
+def search_clients(db: Session, q: str, limit: int = 10) -> list[Client]:
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        # Operadores servidos pelos índices GIN pg_trgm (inclusive o ILIKE)
+        rank = func.greatest(func.similarity(Client.name, q), func.similarity(Client.email, q))
+        return (
+            db.query(Client)
+            .filter(or_(
+                Client.name.op("%")(q),
+                Client.email.op("%")(q),
+                Client.name.ilike(f"%{q}%"),
+                Client.email.ilike(f"%{q}%"),
+            ))
+            .order_by(rank.desc(), Client.id)
+            .limit(limit)
+            .all()
         )
 
-    new_client = Client(**client_data.dict())
-    db.add(new_client)
-    db.commit()
-    db.refresh(new_client)
-    return new_client
+    if dialect == "sqlite":
+        match = _fts_query(q)
+        if not match:
+            return []
+        statement = text(
+            "SELECT clients.* FROM clients "
+            "JOIN clients_fts ON clients_fts.rowid = clients.id "
+            "WHERE clients_fts MATCH :match "
+            "ORDER BY bm25(clients_fts), clients.id LIMIT :limit"
+        )
+        return db.query(Client).from_statement(statement).params(match=match, limit=limit).all()
+
+    return (
+        db.query(Client)
+        .filter(or_(Client.name.ilike(f"%{q}%"), Client.email.ilike(f"%{q}%")))
+        .order_by(Client.id)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import os
+
+from sqlalchemy import select
+
+from app.db.connection import session_like
+from app.models.client import Client
+from app.services.client import filter_clients
+
+EXPORT_COLUMNS = (Client.id, Client.name, Client.email, Client.cpf, Client.phone)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+# Linhas buscadas por vez no cursor do servidor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _export_statement(name: str | None, email: str | None):
+    # Colunas em vez de entidades: nada se acumula no identity map da sessão
+    statement = filter_clients(select(*EXPORT_COLUMNS), name, email).order_by(Client.id)
+    return statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _encode(fmt: str, rows) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + "\n" for row in rows)
+
+
+def _iter_sync(db, fmt, name, email):
+    session = session_like(db)
+    try:
+        if fmt == "csv":
+            yield _encode(fmt, [EXPORT_FIELDS])
+        for partition in session.execute(_export_statement(name, email)).partitions():
+            yield _encode(fmt, partition)
+    finally:
+        session.close()
+
+
+async def _iter_async(db, fmt, name, email):
+    session = session_like(db)
+    try:
+        if fmt == "csv":
+            yield _encode(fmt, [EXPORT_FIELDS])
+        result = await session.stream(_export_statement(name, email))
+        async for partition in result.partitions():
+            yield _encode(fmt, partition)
+    finally:
+        await session.close()
+
+
+def iter_export(db, fmt: str, name: str | None = None, email: str | None = None):
+    """Gera o export em blocos, lendo por cursor no servidor (stream_results).
+
+    Usa uma sessão própria, aberta e fechada pelo próprio gerador, já que o
+    corpo é consumido enquanto a resposta é enviada.
+    """
+    if hasattr(db, "run_sync"):
+        return _iter_async(db, fmt, name, email)
+    return _iter_sync(db, fmt, name, email)
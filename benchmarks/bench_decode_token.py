@@ -0,0 +1,26 @@
+"""Micro-benchmark de decode_token com e sem o cache de tokens verificados.
+
+Uso: python -m benchmarks.bench_decode_token [iterações]
+"""
+import sys
+import timeit
+
+from app.core.security import create_access_token, decode_token, token_cache, verify_token
+
+
+def main(iterations: int = 20000):
+    token = create_access_token({"sub": "bench@example.com"})
+    token_cache.clear()
+    decode_token(token)  # aquece o cache
+
+    results = {
+        "uncached": timeit.timeit(lambda: verify_token(token), number=iterations),
+        "cached": timeit.timeit(lambda: decode_token(token), number=iterations),
+    }
+    for name, elapsed in results.items():
+        print(f"{name:>8}: {iterations / elapsed:>12,.0f} decodes/s")
+    print(f" speedup: {results['uncached'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,66 @@
+"""Benchmark de serialização de páginas de clientes (linhas/s).
+
+Compara o caminho antigo de list_clients (entidades ORM -> ClientOut ->
+jsonable_encoder -> json) com o caminho rápido (colunas -> dict -> orjson).
+
+Uso: python -m benchmarks.bench_serialization [repetições]
+"""
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.responses import FastJSONResponse
+from app.db.base import Base
+from app.models.client import Client
+from app.schemas.client import ClientOut
+from app.services.client import CLIENT_COLUMNS
+
+PAGE_SIZES = (1_000, 10_000)
+
+
+def seed(db: Session, count: int):
+    db.execute(insert(Client), [
+        {"name": f"Cliente {i}", "email": f"cliente{i}@example.com", "cpf": f"{i:011d}", "phone": "31999999999"}
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def orm_path(db: Session, limit: int) -> bytes:
+    clients = db.query(Client).order_by(Client.id).limit(limit).all()
+    content = jsonable_encoder([ClientOut.model_validate(c) for c in clients])
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(db: Session, limit: int) -> bytes:
+    rows = db.query(*CLIENT_COLUMNS).order_by(Client.id).limit(limit).all()
+    return FastJSONResponse([row._asdict() for row in rows]).body
+
+
+def measure(fn, db: Session, limit: int, repeat: int) -> float:
+    fn(db, limit)  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db.expunge_all()
+        fn(db, limit)
+    return limit * repeat / (time.perf_counter() - start)
+
+
+def main(repeat: int = 5):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        seed(db, max(PAGE_SIZES))
+        for limit in PAGE_SIZES:
+            before = measure(orm_path, db, limit, repeat)
+            after = measure(fast_path, db, limit, repeat)
+            print(f"page={limit:>6}: orm {before:>10,.0f} rows/s | fast {after:>10,.0f} rows/s | {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,174 @@
+"""Teste de carga da API pelo transporte ASGI (sem rede nem servidor).
+
+Popula um banco com benchmarks.seed e mede cada cenário em sequência,
+com N requisições e C concorrentes: login, create, get, list, search e
+update. O resultado sai em JSON (p50/p99 em ms, requisições/s, erros),
+para comparar commits:
+
+    python -m benchmarks.load_test --clients 100000 --output before.json
+
+Roda em SQLite por padrão (--db). O seed apaga e recria as tabelas; com
+DATABASE_URL fora do SQLite é preciso passar --i-know-this-drops-tables
+(ou --no-seed). Como os módulos leem a configuração no
+import, o ambiente é ajustado antes de importar a aplicação: sem rate
+limit e com bcrypt de custo BCRYPT_ROUNDS (4, salvo se já definido).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from statistics import quantiles
+
+SCENARIOS = ("login", "create", "get", "list", "search", "update")
+
+
+def percentile(latencies: list[float], p: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+    return quantiles(latencies, n=100, method="inclusive")[p - 1]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_client(n: int) -> dict:
+    return {"name": f"Novo {n}", "email": f"novo{n}@example.com", "cpf": f"{n:011d}", "phone": "31988888888"}
+
+
+def build_requests(args, auth: dict):
+    """Retorna {cenário: fn(i) -> (método, url, kwargs)} sobre os dados semeados."""
+    from benchmarks.seed import BENCH_PASSWORD, user_email
+
+    rng = random.Random(args.random_seed)
+    client_id = lambda: rng.randint(1, args.clients)  # noqa: E731
+    # Clientes novos começam depois dos semeados para não colidir email/CPF
+    # (o contador segue entre aquecimento e medição)
+    new_offset = args.clients + rng.randint(1, 10**6) * 10**4
+    new_ids = itertools.count(new_offset)
+
+    return {
+        "login": lambda i: ("POST", "/auth/login", {
+            "json": {"email": user_email(rng.randrange(args.users)), "password": BENCH_PASSWORD},
+        }),
+        "create": lambda i: ("POST", "/clients/", {"headers": auth, "json": new_client(next(new_ids))}),
+        "get": lambda i: ("GET", f"/clients/{client_id()}", {"headers": auth}),
+        "list": lambda i: ("GET", "/clients/", {"headers": auth, "params": {"limit": 20, "sort": "name"}}),
+        "search": lambda i: ("GET", "/clients/search", {"headers": auth, "params": {"q": f"Cliente {client_id()}"}}),
+        "update": lambda i: ("PUT", f"/clients/{client_id()}", {"headers": auth, "json": {"phone": f"31{i:09d}"}}),
+    }
+
+
+async def run_scenario(http, make_request, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        method, url, kwargs = make_request(i)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await http.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+
+    from app.db.connection import engine
+    from app.main import app
+    from benchmarks.seed import BENCH_PASSWORD, seed, user_email
+
+    result = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "clients": args.clients,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "seed": None if args.no_seed else seed(engine, args.clients, args.users, args.drop_tables),
+        "scenarios": {},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        login = await http.post("/auth/login", json={"email": user_email(0), "password": BENCH_PASSWORD})
+        login.raise_for_status()
+        auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        requests = build_requests(args, auth)
+        for name in args.scenarios:
+            make_request = requests[name]
+            # Aquecimento: caches, pool de conexões e planos de consulta
+            await run_scenario(http, make_request, min(args.warmup, args.requests), args.concurrency)
+            result["scenarios"][name] = await run_scenario(http, make_request, args.requests, args.concurrency)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10_000, help="clientes semeados (10^4 a 10^6)")
+    parser.add_argument("--users", type=int, default=1_000, help="usuários semeados")
+    parser.add_argument("--requests", type=int, default=500, help="requisições por cenário")
+    parser.add_argument("--warmup", type=int, default=50, help="requisições de aquecimento por cenário")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="lista separada por vírgulas")
+    parser.add_argument("--db", default="./bench.db", help="arquivo SQLite (ignorado se DATABASE_URL estiver definido)")
+    parser.add_argument("--no-seed", action="store_true", help="reaproveita os dados já semeados")
+    parser.add_argument("--i-know-this-drops-tables", dest="drop_tables", action="store_true",
+                        help="permite semear (apagando as tabelas) um banco que não seja SQLite")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="grava o JSON neste arquivo além de imprimir")
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"cenários desconhecidos: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{args.db}")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+    from benchmarks.seed import SeedRefused
+
+    try:
+        result = asyncio.run(run(args))
+    except SeedRefused as e:
+        sys.exit(str(e))
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
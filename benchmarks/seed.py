@@ -0,0 +1,89 @@
+"""Gerador de dados para benchmarks: clientes e usuários em massa.
+
+Insere em lotes com executemany, todos os usuários com o mesmo hash de
+senha (um único bcrypt). Os dados são determinísticos: cliente i tem
+email cliente{i}@example.com e CPF i com 11 dígitos; usuário i tem email
+user{i}@example.com e senha BENCH_PASSWORD.
+
+Uso: python -m benchmarks.seed [clientes] [usuários] [--i-know-this-drops-tables]
+
+Usa DATABASE_URL e APAGA as tabelas da aplicação antes de recriá-las
+(drop_all + create_all). Só bancos SQLite, tratados como descartáveis, são
+aceitos sem a flag --i-know-this-drops-tables.
+"""
+import argparse
+import time
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+
+from app.core.security import hash_password
+from app.db.base import Base
+from app.models.client import Client
+from app.models.user import RoleEnum, User
+
+BENCH_PASSWORD = "bench-password"
+BATCH_SIZE = 10_000
+DROP_TABLES_FLAG = "--i-know-this-drops-tables"
+
+
+class SeedRefused(RuntimeError):
+    pass
+
+
+def client_row(i: int) -> dict:
+    return {"name": f"Cliente {i}", "email": f"cliente{i}@example.com", "cpf": f"{i:011d}", "phone": "31999999999"}
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@example.com"
+
+
+def _insert(conn, table, rows_for, count: int):
+    for start in range(0, count, BATCH_SIZE):
+        conn.execute(insert(table), [rows_for(i) for i in range(start, min(start + BATCH_SIZE, count))])
+
+
+def seed(engine: Engine, clients: int, users: int, drop_tables: bool = False) -> dict:
+    """Apaga e recria as tabelas e insere os dados; retorna o tempo de cada etapa.
+
+    Fora do SQLite só roda com drop_tables=True (DROP_TABLES_FLAG na linha de comando).
+    """
+    if engine.dialect.name != "sqlite" and not drop_tables:
+        raise SeedRefused(
+            f"O seed apaga todas as tabelas de {engine.url.render_as_string(hide_password=True)}; "
+            f"use {DROP_TABLES_FLAG} se o banco for mesmo descartável"
+        )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    hashed = hash_password(BENCH_PASSWORD)
+    timings = {}
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Só para a carga: o arquivo é descartável
+            conn.execute(text("PRAGMA synchronous=OFF"))
+        start = time.perf_counter()
+        _insert(conn, User, lambda i: {
+            "name": f"Usuário {i}", "email": user_email(i), "hashed_password": hashed, "role": RoleEnum.user,
+        }, users)
+        timings["users_seconds"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        _insert(conn, Client, client_row, clients)
+        timings["clients_seconds"] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clients", type=int, nargs="?", default=10_000)
+    parser.add_argument("users", type=int, nargs="?", default=1_000)
+    parser.add_argument(DROP_TABLES_FLAG, dest="drop_tables", action="store_true",
+                        help="permite apagar as tabelas de um banco que não seja SQLite")
+    args = parser.parse_args()
+
+    from app.db.connection import engine
+
+    try:
+        print(seed(engine, args.clients, args.users, args.drop_tables))
+    except SeedRefused as e:
+        parser.error(str(e))
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Falha se o bloco executar mais de `limit` comandos SQL.
+
+    Conta em todos os Engines, inclusive os usados pelo threadpool das rotas:
+        with assert_max_queries(2):
+            client.get("/clients/", headers=headers)
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "after_cursor_execute", record)
+    assert len(statements) <= limit, (
+        f"{len(statements)} consultas executadas (máximo {limit}):\n" + "\n".join(statements)
+    )
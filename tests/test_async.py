@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.dependencies import get_db
+from app.main import app
+from tests.test_clients import TEST_DB_FILE, client, get_auth_header, override_get_db
+
+# Mesmo banco dos outros testes, acessado pelo driver assíncrono
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_FILE}", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+@pytest.fixture
+def async_session_mode():
+    app.dependency_overrides[get_db] = override_get_async_db
+    yield
+    app.dependency_overrides[get_db] = override_get_db
+
+def test_client_crud_with_async_session(async_session_mode):
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    payload = {
+        "name": f"Assíncrono {unique_id}",
+        "email": f"async{unique_id}@example.com",
+        "cpf": f"2222222{unique_id[:4]}",
+    }
+
+    response = client.post("/clients/", json=payload, headers=headers)
+    assert response.status_code == 200
+    client_id = response.json()["id"]
+
+    response = client.put(f"/clients/{client_id}", json={"phone": "31900000000"}, headers=headers)
+    assert response.json()["phone"] == "31900000000"
+
+    response = client.get(f"/clients/?name=Assíncrono {unique_id}", headers=headers)
+    assert [c["id"] for c in response.json()] == [client_id]
+
+    assert client.delete(f"/clients/{client_id}", headers=headers).status_code == 200
+    assert client.get(f"/clients/{client_id}", headers=headers).status_code == 404
+
+def test_login_with_async_session(async_session_mode):
+    email = f"asynclogin{uuid.uuid4().hex[:8]}@example.com"
+    response = client.post("/auth/register", json={"name": "Async", "email": email, "password": "segredo"})
+    assert response.status_code == 200
+
+    response = client.post("/auth/login", json={"email": email, "password": "segredo"})
+    assert response.status_code == 200
+
+def test_export_with_async_session(async_session_mode):
+    headers = get_auth_header()
+    response = client.get("/clients/export?format=ndjson", headers=headers)
+    assert response.status_code == 200
+    assert all(line.startswith('{"id": ') for line in response.text.splitlines())
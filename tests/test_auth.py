@@ -0,0 +1,54 @@
+import uuid
+
+from app.core.rate_limit import rate_limit_store
+from app.core.security import BCRYPT_ROUNDS, pwd_context
+from app.models.user import User
+from tests.test_clients import TestingSessionLocal, client
+
+
+def test_register_and_login():
+    email = f"auth{uuid.uuid4().hex[:8]}@example.com"
+    response = client.post("/auth/register", json={"name": "Auth", "email": email, "password": "segredo"})
+    assert response.status_code == 200
+
+    response = client.post("/auth/register", json={"name": "Auth", "email": email, "password": "segredo"})
+    assert response.status_code == 400
+
+    response = client.post("/auth/login", json={"email": email, "password": "segredo"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    response = client.post("/auth/login", json={"email": email, "password": "errada"})
+    assert response.status_code == 401
+
+
+def test_login_rehashes_password_when_cost_changes():
+    email = f"rehash{uuid.uuid4().hex[:8]}@example.com"
+    old_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("segredo")
+    db = TestingSessionLocal()
+    db.add(User(name="Rehash", email=email, hashed_password=old_hash, role="user"))
+    db.commit()
+
+    response = client.post("/auth/login", json={"email": email, "password": "segredo"})
+    assert response.status_code == 200
+
+    db.expire_all()
+    new_hash = db.query(User).filter_by(email=email).one().hashed_password
+    db.close()
+    assert new_hash != old_hash
+    assert new_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+
+def test_login_rate_limit_per_account():
+    email = f"limite{uuid.uuid4().hex[:8]}@example.com"
+    try:
+        statuses = [
+            client.post("/auth/login", json={"email": email, "password": "errada"}).status_code
+            for _ in range(6)
+        ]
+        # As 5 primeiras passam (e falham na senha); a sexta é barrada antes do banco
+        assert statuses == [401] * 5 + [429]
+        response = client.post("/auth/login", json={"email": email, "password": "errada"})
+        assert int(response.headers["Retry-After"]) >= 1
+    finally:
+        rate_limit_store.clear()
@@ -0,0 +1,149 @@
+import json
+import uuid
+
+from app.services import bulk_import
+from tests.test_clients import client, get_auth_header
+
+
+def test_bulk_import_csv_reports_row_errors():
+    headers = get_auth_header()
+    uid = f"{uuid.uuid4().int % 10**6:06d}"
+    body = "\n".join([
+        "name,email,cpf,phone",
+        f"Lote A,lotea{uid}@example.com,111{uid}00,31999999999",
+        f"Lote B,loteb{uid}@example.com,222{uid}00,",
+        f"Lote C,lotea{uid}@example.com,333{uid}00,",  # email repetido no arquivo
+        f"Lote D,email-invalido,444{uid}00,",
+    ])
+    response = client.post("/clients/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert (job["total"], job["inserted"]) == (4, 2)
+    assert [e["row"] for e in job["errors"]] == [3, 4]
+    assert job["errors"][0]["error"] == "Email já cadastrado"
+
+    # Reimportar as mesmas linhas acusa duplicatas já gravadas
+    response = client.post("/clients/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+    assert response.json()["inserted"] == 0
+
+
+def test_bulk_import_large_file_runs_as_job(monkeypatch):
+    monkeypatch.setattr(bulk_import, "BULK_IMPORT_SYNC_ROWS", 2)
+    headers = get_auth_header()
+    uid = f"{uuid.uuid4().int % 10**6:06d}"
+    lines = [
+        json.dumps({"name": f"Job {i}", "email": f"job{i}_{uid}@example.com", "cpf": f"5{i}{uid}000"})
+        for i in range(3)
+    ]
+    response = client.post(
+        "/clients/bulk",
+        content="\n".join(lines + ["{quebrado"]),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    status = client.get(f"/clients/bulk/{job_id}", headers=headers).json()
+    assert status["status"] == "done"
+    assert status["inserted"] == 3
+    assert status["errors"] == [{"row": 4, "error": "Linha inválida"}]
+
+
+def test_bulk_import_validates_and_inserts_in_batches(monkeypatch):
+    monkeypatch.setattr(bulk_import, "BULK_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(bulk_import, "READ_CHUNK_BYTES", 16)
+    batches = []
+    insert_batch = bulk_import.insert_batch
+
+    def recording_insert_batch(db, job, batch):
+        batches.append([row for row, _ in batch])
+        insert_batch(db, job, batch)
+
+    monkeypatch.setattr(bulk_import, "insert_batch", recording_insert_batch)
+    headers = {**get_auth_header(), "Content-Type": "text/csv"}
+    uid = f"{uuid.uuid4().int % 10**6:06d}"
+    body = "\n".join(
+        ["name,email,cpf"] + [f"Lote{uid} {i},lotes{i}_{uid}@example.com,9{i}{uid}000" for i in range(5)]
+    )
+    response = client.post("/clients/bulk", content=body, headers=headers)
+    assert response.json()["inserted"] == 5
+    # Nunca mais que um lote validado em memória
+    assert batches == [[1, 2], [3, 4], [5]]
+
+
+def test_bulk_import_csv_quoted_newlines_and_encoding():
+    headers = {**get_auth_header(), "Content-Type": "text/csv"}
+    uid = f"{uuid.uuid4().int % 10**6:06d}"
+    body = "\ufeffname,email,cpf\r\n" + "\r\n".join([
+        f'"Loja\r\nCentro {uid}",multi{uid}@example.com,888{uid}00',
+        f"Outra {uid},outra{uid}@example.com,889{uid}00",
+    ])
+    response = client.post("/clients/bulk", content=body.encode("utf-8"), headers=headers)
+    assert response.json()["inserted"] == 2
+    assert response.json()["errors"] == []
+    listed = client.get("/clients/", params={"email": f"multi{uid}"}, headers=headers).json()
+    assert listed[0]["name"] == f"Loja\r\nCentro {uid}"
+
+    latin1 = f"name,email,cpf\nJoão,latin{uid}@example.com,887{uid}00\n".encode("latin-1")
+    response = client.post("/clients/bulk", content=latin1, headers=headers)
+    assert response.status_code == 400
+
+
+def test_bulk_import_rejects_unknown_format():
+    response = client.post("/clients/bulk", content="x", headers={**get_auth_header(), "Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_export_streams_filtered_clients():
+    headers = get_auth_header()
+    uid = f"{uuid.uuid4().int % 10**6:06d}"
+    body = "\n".join(
+        ["name,email,cpf"] + [f"Export{uid} {i},export{i}_{uid}@example.com,6{i}{uid}000" for i in range(3)]
+    )
+    client.post("/clients/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+
+    response = client.get(f"/clients/export?format=csv&name=Export{uid}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,email,cpf,phone"
+    assert [line.split(",")[1] for line in lines[1:]] == [f"Export{uid} {i}" for i in range(3)]
+
+    response = client.get(f"/clients/export?format=ndjson&email=export1_{uid}", headers=headers)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["email"] for row in rows] == [f"export1_{uid}@example.com"]
+    assert rows[0]["phone"] is None
+
+
+def test_bulk_update_and_delete():
+    headers = get_auth_header()
+    uid = f"{uuid.uuid4().int % 10**6:06d}"
+    body = "\n".join(
+        ["name,email,cpf"] + [f"Massa{uid} {i},massa{i}_{uid}@example.com,7{i}{uid}000" for i in range(3)]
+    )
+    client.post("/clients/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+    rows = client.get(f"/clients/?name=Massa{uid}", headers=headers).json()
+    ids = [row["id"] for row in rows]
+
+    # Simulação não altera nada
+    selection = {"name": f"Massa{uid}", "changes": {"phone": "31900000000"}}
+    response = client.post("/clients/bulk-update", json={**selection, "dry_run": True}, headers=headers)
+    assert response.json() == {"affected": 3, "dry_run": True}
+    assert client.get(f"/clients/{ids[0]}", headers=headers).json()["phone"] is None
+
+    response = client.post("/clients/bulk-update", json=selection, headers=headers)
+    assert response.json() == {"affected": 3, "dry_run": False}
+    updated = client.get(f"/clients/{ids[0]}", headers=headers).json()
+    assert (updated["phone"], updated["version"]) == ("31900000000", 2)
+
+    # name é NOT NULL: null explícito é recusado antes do UPDATE
+    response = client.post("/clients/bulk-update", json={**selection, "changes": {"name": None}}, headers=headers)
+    assert response.status_code == 422
+
+    response = client.post("/clients/bulk-delete", json={"ids": ids[:2] + [999999]}, headers=headers)
+    assert response.json() == {"affected": 2, "dry_run": False}
+    assert [row["id"] for row in client.get(f"/clients/?name=Massa{uid}", headers=headers).json()] == ids[2:]
+
+    # Sem ids nem filtro a operação é recusada
+    assert client.post("/clients/bulk-delete", json={}, headers=headers).status_code == 422
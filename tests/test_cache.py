@@ -0,0 +1,27 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_ttl_cache_expiration():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("curto", "x", ttl=0.01)
+    cache.set("ignorado", "y", ttl=0)
+    time.sleep(0.02)
+
+    assert cache.get("curto") is None
+    assert cache.get("ignorado") is None
+    assert len(cache) == 0
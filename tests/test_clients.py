@@ -1,15 +1,22 @@
+import asyncio
 import os
 import uuid
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.db.base import Base
-from app.core.dependencies import get_db
+from app.core.dependencies import get_db, principal_cache
 from app.models.user import User
+from app.models.client import Client
 from app.core.security import create_access_token
+from app.services import client as client_service
+from app.services.client import client_cache
+from app.core.pagination import encode_cursor
+from app.db.connection import on_commit, run_write
 
 # Remove o banco anterior para evitar conflitos
 TEST_DB_FILE = "./test.db"
@@ -58,7 +65,7 @@ def get_auth_header():
 
 def test_create_client():
     headers = get_auth_header()
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
     payload = {
         "name": f"Cliente {unique_id}",
         "email": f"cliente{unique_id}@example.com",
@@ -75,7 +82,7 @@ def test_list_clients():
     headers = get_auth_header()
 
     # Criar cliente único
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
     payload = {
         "name": f"Cliente {unique_id}",
         "email": f"cliente{unique_id}@example.com",
@@ -99,7 +106,7 @@ def test_list_clients():
 
 def test_duplicate_cpf():
     headers = get_auth_header()
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
     cpf = f"99999999{unique_id[:3]}"
 
     payload = {
@@ -124,7 +131,7 @@ def test_update_client():
     headers = get_auth_header()
 
     # Criar cliente original
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
     payload = {
         "name": f"Cliente {unique_id}",
         "email": f"cliente{unique_id}@example.com",
@@ -151,11 +158,19 @@ def test_update_client():
     assert updated_data["name"] == "Cliente Atualizado"
     assert updated_data["phone"] == "31911111111"
 
+    # name e email são NOT NULL: null explícito é 422, sem tocar no banco
+    for field in ("name", "email"):
+        response = client.put(f"/clients/{client_id}", json={field: None}, headers=headers)
+        assert response.status_code == 422
+        response = client.patch(f"/clients/{client_id}", json={field: None, "version": 2}, headers=headers)
+        assert response.status_code == 422
+    assert client.get(f"/clients/{client_id}", headers=headers).json()["name"] == "Cliente Atualizado"
+
 def test_delete_client():
     headers = get_auth_header()
 
     # Criar cliente para deletar
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
     payload = {
         "name": f"Cliente {unique_id}",
         "email": f"clientedel{unique_id}@example.com",
@@ -176,4 +191,372 @@ def test_delete_client():
     assert response_list.status_code == 200
     data = response_list.json()
 
-    assert all(c["id"] != client_id for c in data)
\ No newline at end of file
+    assert all(c["id"] != client_id for c in data)
+def test_list_clients_cursor_pagination():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    for i in range(3):
+        payload = {
+            "name": f"Paginado {unique_id} {i}",
+            "email": f"pag{i}_{unique_id}@example.com",
+            "cpf": f"7777777{i}{unique_id[:3]}",
+            "phone": "31966666666"
+        }
+        assert client.post("/clients/", json=payload, headers=headers).status_code == 200
+
+    # Percorre as páginas seguindo o cursor retornado
+    seen = []
+    cursors = []
+    url = f"/clients/?name=Paginado {unique_id}&sort=-name&limit=2"
+    response = client.get(url, headers=headers)
+    while True:
+        assert response.status_code == 200
+        seen.extend(c["name"] for c in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        cursors.append(cursor)
+        response = client.get(f"{url}&after={cursor}", headers=headers)
+
+    assert seen == [f"Paginado {unique_id} {i}" for i in (2, 1, 0)]
+
+    # Cursor gerado para outra ordenação é rejeitado
+    response = client.get(f"/clients/?sort=email&after={cursors[0]}", headers=headers)
+    assert response.status_code == 400
+
+    # Valores de tipo errado no cursor também são rejeitados
+    for sort, value, last_id in (("-name", {"a": 1}, 1), ("-name", "x", "1"), ("id", "1", 1), ("-name", "x", True)):
+        forged = encode_cursor(sort, value, last_id)
+        response = client.get(f"/clients/?sort={sort}&after={forged}", headers=headers)
+        assert response.status_code == 400
+
+def test_duplicate_detail_only_for_unique_violations():
+    def error(message):
+        return IntegrityError("INSERT", {}, Exception(message))
+
+    assert client_service.duplicate_detail(error("UNIQUE constraint failed: clients.email")) == "Email já cadastrado"
+    assert client_service.duplicate_detail(error("UNIQUE constraint failed: clients.cpf")) == "CPF já cadastrado"
+    assert client_service.duplicate_detail(error("NOT NULL constraint failed: clients.email")) is None
+    with pytest.raises(IntegrityError):
+        client_service.raise_for_duplicate(error("NOT NULL constraint failed: clients.name"))
+
+def test_search_clients():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    payloads = [
+        {"name": f"Joana Busca{unique_id}", "email": f"joana{unique_id}@example.com", "cpf": f"4444444{unique_id[:4]}"},
+        {"name": f"Busca{unique_id} Busca{unique_id}", "email": f"outra{unique_id}@example.com", "cpf": f"3333333{unique_id[:4]}"},
+    ]
+    for payload in payloads:
+        assert client.post("/clients/", json=payload, headers=headers).status_code == 200
+
+    response = client.get(f"/clients/search?q=busca{unique_id}", headers=headers)
+    assert response.status_code == 200
+    names = [c["name"] for c in response.json()]
+    # O nome com mais ocorrências do termo vem primeiro
+    assert names == [payloads[1]["name"], payloads[0]["name"]]
+
+    response = client.get(f"/clients/search?q=joana{unique_id[:4]}", headers=headers)
+    assert [c["email"] for c in response.json()] == [payloads[0]["email"]]
+
+def test_run_write_commits_or_rolls_back():
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    email = f"uow{unique_id}@example.com"
+    committed = []
+
+    def write(db, fail):
+        db.add(Client(name="Unit of work", email=email, cpf=f"5555555{unique_id[:4]}"))
+        db.flush()
+        on_commit(db, lambda: committed.append(db.query(Client).filter(Client.email == email).count()))
+        if fail:
+            raise ValueError("falhou")
+
+    db = TestingSessionLocal()
+    try:
+        # Exceção: rollback e o on_commit é descartado
+        with pytest.raises(ValueError):
+            asyncio.run(run_write(db, write, True))
+        assert committed == []
+        assert db.query(Client).filter(Client.email == email).count() == 0
+
+        # Sucesso: commit antes do on_commit
+        asyncio.run(run_write(db, write, False))
+        assert committed == [1]
+        assert "on_commit" not in db.info
+    finally:
+        db.close()
+
+def test_single_session_per_request():
+    headers = get_auth_header()
+    opened = []
+
+    def counting_get_db():
+        db = TestingSessionLocal()
+        opened.append(db)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Autenticação e endpoint devem compartilhar a mesma sessão
+    app.dependency_overrides[get_db] = counting_get_db
+    try:
+        response = client.get("/clients/", headers=headers)
+    finally:
+        app.dependency_overrides[get_db] = override_get_db
+
+    assert response.status_code == 200
+    assert len(opened) == 1
+
+def test_principal_cache_invalidation():
+    headers = get_auth_header()
+    principal_cache.clear()
+
+    assert client.get("/clients/", headers=headers).status_code == 200
+    hits = principal_cache.stats()["hits"]
+    assert client.get("/clients/", headers=headers).status_code == 200
+    assert principal_cache.stats()["hits"] == hits + 1
+
+    # Alterar o usuário pelo ORM remove a entrada do cache
+    db = TestingSessionLocal()
+    user = db.query(User).filter_by(email="testuser@example.com").first()
+    user.role = "user"
+    db.commit()
+    db.close()
+    assert principal_cache.get("testuser@example.com") is None
+
+def test_duplicate_email_under_concurrency():
+    from concurrent.futures import ThreadPoolExecutor
+
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+
+    def create(i):
+        payload = {
+            "name": f"Corrida {i}",
+            "email": f"corrida{unique_id}@example.com",
+            "cpf": f"8888888{i}{unique_id[:3]}",
+        }
+        return client.post("/clients/", json=payload, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(create, range(4)))
+
+    # O índice único garante exatamente um cadastro
+    assert sorted(r.status_code for r in responses) == [200, 400, 400, 400]
+    assert {r.json()["detail"] for r in responses if r.status_code == 400} == {"Email já cadastrado"}
+
+def test_patch_client_optimistic_concurrency():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    payload = {
+        "name": f"Versionado {unique_id}",
+        "email": f"versao{unique_id}@example.com",
+        "cpf": f"6666666{unique_id[:4]}",
+    }
+    created = client.post("/clients/", json=payload, headers=headers).json()
+    assert created["version"] == 1
+
+    response = client.patch(f"/clients/{created['id']}", json={"name": "Primeiro", "version": 1}, headers=headers)
+    assert response.status_code == 200
+    assert (response.json()["name"], response.json()["version"]) == ("Primeiro", 2)
+
+    # Segundo editor ainda com a versão 1: conflito, nada é sobrescrito
+    response = client.patch(f"/clients/{created['id']}", json={"name": "Segundo", "version": 1}, headers=headers)
+    assert response.status_code == 409
+    assert client.get(f"/clients/{created['id']}", headers=headers).json()["name"] == "Primeiro"
+
+    # PUT continua funcionando e também avança a versão
+    response = client.put(f"/clients/{created['id']}", json={"phone": "31900000001"}, headers=headers)
+    assert response.json()["version"] == 3
+
+    assert client.patch("/clients/999999", json={"version": 1}, headers=headers).status_code == 404
+
+def test_conditional_requests():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    payload = {
+        "name": f"Condicional {unique_id}",
+        "email": f"cond{unique_id}@example.com",
+        "cpf": f"1212121{unique_id[:4]}",
+    }
+    client_id = client.post("/clients/", json=payload, headers=headers).json()["id"]
+
+    response = client.get(f"/clients/{client_id}", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get(f"/clients/{client_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    list_url = f"/clients/?name=Condicional {unique_id}"
+    list_etag = client.get(list_url, headers=headers).headers["ETag"]
+    assert client.get(list_url, headers={**headers, "If-None-Match": list_etag}).status_code == 304
+
+    # If-Match com ETag desatualizado é rejeitado
+    response = client.put(f"/clients/{client_id}", json={"phone": "1"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+    response = client.put(f"/clients/{client_id}", json={"phone": "2"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    assert client.delete(f"/clients/{client_id}", headers={**headers, "If-Match": etag}).status_code == 412
+
+    # A listagem muda de validador após a alteração
+    assert client.get(list_url, headers={**headers, "If-None-Match": list_etag}).status_code == 200
+    assert client.delete(f"/clients/{client_id}", headers={**headers, "If-Match": new_etag}).status_code == 200
+
+def test_get_client_read_through_cache():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    payload = {
+        "name": f"Cacheado {unique_id}",
+        "email": f"cache{unique_id}@example.com",
+        "cpf": f"1313131{unique_id[:4]}",
+    }
+    client_id = client.post("/clients/", json=payload, headers=headers).json()["id"]
+
+    client.get(f"/clients/{client_id}", headers=headers)
+    hits = client_cache.stats()["hits"]
+    assert client.get(f"/clients/{client_id}", headers=headers).status_code == 200
+    assert client_cache.stats()["hits"] == hits + 1
+
+    # Escritas invalidam a entrada: a leitura seguinte reflete a alteração
+    client.put(f"/clients/{client_id}", json={"name": "Cache Atualizado"}, headers=headers)
+    assert client.get(f"/clients/{client_id}", headers=headers).json()["name"] == "Cache Atualizado"
+
+    client.delete(f"/clients/{client_id}", headers=headers)
+    assert client.get(f"/clients/{client_id}", headers=headers).status_code == 404
+
+def test_read_through_skips_fill_after_concurrent_invalidation(monkeypatch):
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    client_id = client.post("/clients/", json={
+        "name": f"Corrida {unique_id}", "email": f"corrida{unique_id}@example.com", "cpf": f"1717171{unique_id[:4]}",
+    }, headers=headers).json()["id"]
+
+    original = client_service.get_client
+
+    def read_then_concurrent_write(db, cid):
+        row = original(db, cid)
+        client_service.invalidate_client(cid)  # escrita concluída após a leitura
+        return row
+
+    monkeypatch.setattr(client_service, "get_client", read_then_concurrent_write)
+    assert client.get(f"/clients/{client_id}", headers=headers).status_code == 200
+    assert client_cache.get(client_id) is None
+
+    monkeypatch.setattr(client_service, "get_client", original)
+    client.get(f"/clients/{client_id}", headers=headers)
+    assert client_cache.get(client_id) is not None
+
+def test_sparse_fieldsets():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    payload = {
+        "name": f"Esparso {unique_id}",
+        "email": f"esparso{unique_id}@example.com",
+        "cpf": f"1414141{unique_id[:4]}",
+    }
+    client_id = client.post("/clients/", json=payload, headers=headers).json()["id"]
+    client_cache.clear()
+
+    response = client.get(f"/clients/{client_id}?fields=id,name", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"id": client_id, "name": payload["name"]}
+    assert response.headers["ETag"]
+
+    response = client.get(f"/clients/?name=Esparso {unique_id}&fields=email&sort=name", headers=headers)
+    assert response.json() == [{"email": payload["email"]}]
+
+    response = client.get("/clients/?fields=id,senha", headers=headers)
+    assert response.status_code == 422
+    assert "senha" in response.json()["detail"]
+
+def test_cpf_and_email_are_canonical():
+    headers = get_auth_header()
+    digits = str(uuid.uuid4().int)[:11]
+    formatted = f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+    payload = {
+        "name": "Canônico",
+        "email": f"Canonico{digits}@Example.com",
+        "cpf": formatted,
+    }
+    response = client.post("/clients/", json=payload, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["cpf"] == digits
+    assert response.json()["email"] == f"canonico{digits}@example.com"
+
+    # O mesmo CPF em outra formatação é duplicata
+    payload["email"] = f"outro{digits}@example.com"
+    payload["cpf"] = digits
+    assert client.post("/clients/", json=payload, headers=headers).status_code == 400
+
+    response = client.get(f"/clients/by-cpf/{formatted}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["cpf"] == digits
+    assert client.get("/clients/by-cpf/000.000.000-00", headers=headers).status_code == 404
+
+def test_cpf_validated_after_normalization():
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    for cpf in ("123.456.78-9", "123.456.789-0a", "1234567890123"):
+        response = client.post("/clients/", json={
+            "name": "CPF Curto", "email": f"curto{unique_id}@example.com", "cpf": cpf,
+        }, headers=headers)
+        assert response.status_code == 422, cpf
+
+    # Linhas antigas fora do formato canônico continuam legíveis
+    db = TestingSessionLocal()
+    legacy = Client(name=f"Legado {unique_id}", email=f"legado{unique_id}@example.com", cpf=f"12345{unique_id}")
+    db.add(legacy)
+    db.commit()
+    legacy_id, legacy_cpf = legacy.id, legacy.cpf
+    db.close()
+    assert client.get(f"/clients/{legacy_id}", headers=headers).json()["cpf"] == legacy_cpf
+    assert client.get(f"/clients/by-cpf/{legacy_cpf}", headers=headers).status_code == 200
+    assert client.get("/clients/search", params={"q": f"Legado {unique_id}"}, headers=headers).status_code == 200
+
+def test_batch_get_clients(monkeypatch):
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    ids = []
+    for i in range(3):
+        payload = {
+            "name": f"Lote {unique_id} {i}",
+            "email": f"batch{i}_{unique_id}@example.com",
+            "cpf": f"1515151{i}{unique_id[:3]}",
+        }
+        ids.append(client.post("/clients/", json=payload, headers=headers).json()["id"])
+
+    requested = [ids[2], 999999, ids[0], ids[1]]
+    response = client.post("/clients/batch-get", json={"ids": requested}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["id"] for c in data["clients"]] == [ids[2], ids[0], ids[1]]
+    assert data["missing"] == [999999]
+
+    monkeypatch.setattr(client_service, "BATCH_GET_MAX_IDS", 2)
+    response = client.post("/clients/batch-get", json={"ids": ids}, headers=headers)
+    assert response.status_code == 422
+
+def test_list_clients_total_count(monkeypatch):
+    headers = get_auth_header()
+    unique_id = f"{uuid.uuid4().int % 10**8:08d}"
+    for i in range(3):
+        payload = {
+            "name": f"Contado {unique_id} {i}",
+            "email": f"conta{i}_{unique_id}@example.com",
+            "cpf": f"1616161{i}{unique_id[:3]}",
+        }
+        client.post("/clients/", json=payload, headers=headers)
+
+    url = f"/clients/?name=Contado {unique_id}&limit=1"
+    assert "X-Total-Count" not in client.get(url, headers=headers).headers
+    assert client.get(f"{url}&count=exact", headers=headers).headers["X-Total-Count"] == "3"
+
+    # Contagens filtradas são limitadas
+    monkeypatch.setattr(client_service, "COUNT_CAP", 2)
+    assert client.get(f"{url}&count=estimated", headers=headers).headers["X-Total-Count"] == "2+"
+
+    total = int(client.get("/clients/?count=estimated", headers=headers).headers["X-Total-Count"])
+    assert total >= 3
@@ -0,0 +1,40 @@
+import io
+import json
+import logging
+
+from app.core import log
+from app.core.security import create_access_token
+
+
+def test_json_log_redacts_tokens():
+    stream = io.StringIO()
+    log.shutdown_logging()
+    log.setup_logging(stream)
+    logger = logging.getLogger("app.tests")
+    logger.setLevel(logging.DEBUG)
+    try:
+        token = create_access_token({"sub": "log@example.com"})
+        logger.debug("Bearer %s", token, extra={"sub": "log@example.com", "token": "abc", "password": "123"})
+    finally:
+        log.shutdown_logging()
+        logger.setLevel(logging.NOTSET)
+
+    entry = json.loads(stream.getvalue().splitlines()[-1])
+    assert token not in stream.getvalue()
+    assert entry["msg"] == f"Bearer {log.REDACTED}"
+    assert entry["logger"] == "app.tests"
+    assert entry["sub"] == "log@example.com"
+    assert entry["token"] == log.REDACTED
+    assert entry["password"] == log.REDACTED
+
+
+def test_sampling_keeps_warnings():
+    sampling = log.SamplingFilter(log.parse_sampling("app.core=0,app.core.cache=1"))
+
+    def record(name, level):
+        return logging.LogRecord(name, level, __file__, 0, "msg", (), None)
+
+    assert not sampling.filter(record("app.core.security", logging.DEBUG))
+    assert sampling.filter(record("app.core.security", logging.WARNING))
+    assert sampling.filter(record("app.core.cache", logging.INFO))
+    assert sampling.filter(record("app.routers.client", logging.DEBUG))
@@ -0,0 +1,26 @@
+import re
+import uuid
+
+from tests.test_clients import client, get_auth_header
+
+
+def test_server_timing_and_metrics():
+    headers = get_auth_header()
+    uid = uuid.uuid4().hex[:8]
+    cpf = f"{uuid.uuid4().int % 10**11:011d}"
+    created = client.post("/clients/", json={
+        "name": "Metricas", "email": f"metricas{uid}@example.com", "cpf": cpf, "phone": "31999999999",
+    }, headers=headers).json()
+
+    response = client.get(f"/clients/{created['id']}", headers=headers)
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert re.search(r'db;dur=[\d.]+;desc="\d+ queries"', timing)
+    assert "app;dur=" in timing
+
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/clients/{client_id}",status="200"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/clients/{client_id}",le="+Inf"}' in text
+    assert re.search(r'http_request_db_queries_total\{method="POST",route="/clients/"\} [1-9]', text)
+    assert 'http_requests_in_progress{method="GET"} 1' in text  # a própria /metrics
+    assert 'cache_hits_total{cache="principal"}' in text
@@ -0,0 +1,60 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core import dependencies
+from app.db import connection
+from app.db.base import Base
+from app.db.pool import pool_stats
+from app.models.client import Client
+from app.services.client import client_cache
+from tests.test_clients import client, get_auth_header
+
+# Segundo arquivo SQLite fazendo o papel da réplica de leitura
+REPLICA_DB_FILE = "./test_replica.db"
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    if os.path.exists(REPLICA_DB_FILE):
+        os.remove(REPLICA_DB_FILE)
+    url = f"sqlite:///{REPLICA_DB_FILE}"
+    engine = create_engine(url, **connection.engine_options(url))
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(connection, "ReplicaSessionLocal", sessionmaker(autoflush=False, bind=engine))
+    dependencies.recent_writers.clear()
+    yield engine
+    dependencies.recent_writers.clear()
+    engine.dispose()
+    os.remove(REPLICA_DB_FILE)
+
+
+def test_reads_use_replica_until_user_writes(replica):
+    headers = get_auth_header()
+    replica_id = 900_000 + uuid.uuid4().int % 10_000
+    with replica.begin() as conn:
+        conn.execute(insert(Client).values(
+            id=replica_id, name="Somente Replica", email=f"replica{replica_id}@example.com", cpf=f"{replica_id:011d}",
+        ))
+
+    # Sem escritas recentes, GET e listagem leem da réplica (sem popular o cache)
+    response = client.get(f"/clients/{replica_id}", headers=headers)
+    assert response.status_code == 200
+    assert client_cache.get(replica_id) is None
+    listed = client.get("/clients/", params={"name": "Somente Replica"}, headers=headers).json()
+    assert [c["id"] for c in listed] == [replica_id]
+
+    # Depois de escrever, o mesmo usuário lê do primário
+    created = client.post("/clients/", json={
+        "name": "Escrita Primario", "email": f"primario{uuid.uuid4().hex[:8]}@example.com",
+        "cpf": f"{uuid.uuid4().int % 10**11:011d}",
+    }, headers=headers).json()
+    assert client.get(f"/clients/{created['id']}", headers=headers).status_code == 200
+    assert client.get(f"/clients/{replica_id}", headers=headers).status_code == 404
+
+    stats = pool_stats(replica)
+    assert stats["checkouts"] >= 2 and stats["checked_out"] == 0
+    assert 'db_pool_checked_out{pool="primary"}' in client.get("/metrics").text
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from app.core.security import ALGORITHM, SECRET_KEY, create_access_token, decode_token, token_cache
+
+
+def test_decode_token_uses_cache():
+    token_cache.clear()
+    token = create_access_token({"sub": "cache@example.com"})
+
+    first = decode_token(token)
+    second = decode_token(token)
+
+    assert first == second
+    assert first["sub"] == "cache@example.com"
+    assert token_cache.stats()["hits"] >= 1
+    # O chamador recebe uma cópia: alterar o payload não afeta o cache
+    second["sub"] = "outro@example.com"
+    assert decode_token(token)["sub"] == "cache@example.com"
+
+
+def test_decode_token_does_not_cache_invalid_tokens():
+    token_cache.clear()
+    expired = jwt.encode(
+        {"sub": "expirado@example.com", "exp": datetime.utcnow() - timedelta(minutes=1)},
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+    forged = jwt.encode({"sub": "forjado@example.com"}, "outra-chave", algorithm=ALGORITHM)
+
+    for token in (expired, forged):
+        with pytest.raises(jwt.InvalidTokenError):
+            decode_token(token)
+    assert len(token_cache) == 0
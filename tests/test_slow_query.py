@@ -0,0 +1,35 @@
+import uuid
+
+from sqlalchemy import text
+
+from app.core.metrics import RequestStats, request_stats
+from app.db.slow_query import SlowQueryRecorder
+from tests.helpers import assert_max_queries
+from tests.test_clients import client, engine, get_auth_header
+
+
+def test_endpoint_query_budget():
+    headers = get_auth_header()
+    client.get("/clients/", headers=headers)  # aquece o cache do usuário
+    with assert_max_queries(1):
+        client.get("/clients/?limit=5", headers=headers)
+    with assert_max_queries(2):
+        client.get("/clients/?limit=5&count=exact", headers=headers)
+
+
+def test_slow_query_recorder_flags_slow_and_repeated_statements():
+    recorder = SlowQueryRecorder(threshold_ms=0, repeat_threshold=3).enable()
+    token = request_stats.set(RequestStats(path="GET /teste"))
+    try:
+        with engine.connect() as conn:
+            for _ in range(4):
+                conn.execute(text("SELECT :id"), {"id": uuid.uuid4().hex})
+    finally:
+        request_stats.reset(token)
+        recorder.disable()
+
+    entry = recorder.recent[-1]
+    assert entry["statement"] == "SELECT ?"
+    assert entry["request"] == "GET /teste"
+    assert entry["plan"] is None  # EXPLAIN só no Postgres
+    assert [r["statement"] for r in recorder.repeated] == ["SELECT ?"]